@@ -3,44 +3,80 @@ AWS Lambda handler for CodeConversion FastAPI application
 """
 import os
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import boto3
 from mangum import Mangum
 
-# Initialize AWS clients
-secrets_client = boto3.client('secretsmanager')
-s3_client = boto3.client('s3')
+# Cold-start phase durations in seconds, reported once the app is imported
+cold_start_phases = {}
+cold_start_began = time.perf_counter()
+
+@contextmanager
+def cold_start_phase(name):
+    """Time one phase of the cold start"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        cold_start_phases[name] = time.perf_counter() - started
+
+# AWS clients are created on first use; building one costs tens of milliseconds
+_clients = {}
+
+def get_client(service):
+    """Shared boto3 client for an AWS service"""
+    if service not in _clients:
+        _clients[service] = boto3.client(service)
+    return _clients[service]
 
 # Global variable to store the app instance
 app = None
 
+def fetch_secret(secret_id):
+    """Fetch and decode a JSON secret from AWS Secrets Manager"""
+    response = get_client('secretsmanager').get_secret_value(SecretId=secret_id)
+    return json.loads(response['SecretString'])
+
+def download_private_key(secrets_bucket, private_key_path):
+    """Download the GitHub App private key from S3 to /tmp (Lambda's writable directory)"""
+    local_key_path = f"/tmp/{os.path.basename(private_key_path)}"
+    get_client('s3').download_file(secrets_bucket, private_key_path, local_key_path)
+    return local_key_path
+
 def load_secrets_from_aws():
     """Load secrets from AWS Secrets Manager and S3"""
     try:
-        # Load GitHub App secrets
         github_secret_name = os.environ.get('GITHUB_APP_SECRET_NAME')
-        if github_secret_name:
-            github_response = secrets_client.get_secret_value(SecretId=github_secret_name)
-            github_secrets = json.loads(github_response['SecretString'])
-            
+        app_secret_name = os.environ.get('APP_SECRET_NAME')
+        db_secret_arn = os.environ.get('DATABASE_SECRET_ARN')
+        secrets_bucket = os.environ.get('SECRETS_BUCKET')
+        private_key_path = os.environ.get('GITHUB_APP_PRIVATE_KEY_PATH')
+        
+        # Fetch every secret and the private key at the same time instead of one round trip after another
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            github_future = executor.submit(fetch_secret, github_secret_name) if github_secret_name else None
+            app_future = executor.submit(fetch_secret, app_secret_name) if app_secret_name else None
+            db_future = executor.submit(fetch_secret, db_secret_arn) if db_secret_arn else None
+            key_future = executor.submit(download_private_key, secrets_bucket, private_key_path) if secrets_bucket and private_key_path else None
+        
+        # Apply in the original order so later secrets still override earlier ones
+        # Load GitHub App secrets
+        if github_future:
             # Map GitHub secrets to expected environment variable names
-            for key, value in github_secrets.items():
+            for key, value in github_future.result().items():
                 os.environ[key.lower()] = value  # Convert to lowercase for pydantic
         
         # Load application secrets
-        app_secret_name = os.environ.get('APP_SECRET_NAME')
-        if app_secret_name:
-            app_response = secrets_client.get_secret_value(SecretId=app_secret_name)
-            app_secrets = json.loads(app_response['SecretString'])
-            
+        if app_future:
             # Map application secrets to expected environment variable names
-            for key, value in app_secrets.items():
+            for key, value in app_future.result().items():
                 os.environ[key.lower()] = value  # Convert to lowercase for pydantic
         
         # Load database credentials
-        db_secret_arn = os.environ.get('DATABASE_SECRET_ARN')
-        if db_secret_arn:
-            db_response = secrets_client.get_secret_value(SecretId=db_secret_arn)
-            db_secrets = json.loads(db_response['SecretString'])
+        if db_future:
+            db_secrets = db_future.result()
             
             # Construct database URL and set required environment variables
             db_host = os.environ.get('DATABASE_HOST')
@@ -57,19 +93,11 @@ def load_secrets_from_aws():
                 os.environ['postgres_password'] = password  # Required by config
                 
                 print(f"✅ Database URL configured: postgresql://{username}:***@{db_host}:{db_port}/{db_name}")
-                
-                # Test database connection and create tables if needed
-                test_and_create_database_tables(database_url)
-        
-        # Download GitHub App private key from S3
-        secrets_bucket = os.environ.get('SECRETS_BUCKET')
-        private_key_path = os.environ.get('GITHUB_APP_PRIVATE_KEY_PATH')
         
-        if secrets_bucket and private_key_path:
+        # GitHub App private key downloaded from S3
+        if key_future:
             try:
-                # Download private key to /tmp (Lambda's writable directory)
-                local_key_path = f"/tmp/{os.path.basename(private_key_path)}"
-                s3_client.download_file(secrets_bucket, private_key_path, local_key_path)
+                local_key_path = key_future.result()
                 os.environ['github_app_private_key_path'] = local_key_path
                 os.environ['GITHUB_APP_PRIVATE_KEY_PATH'] = local_key_path  # Legacy support
             except Exception as e:
@@ -80,48 +108,44 @@ def load_secrets_from_aws():
     except Exception as e:
         print(f"Error loading secrets from AWS: {e}")
 
-def test_and_create_database_tables(database_url):
-    """Test database connection and create tables if they don't exist"""
+def ensure_database_schema():
+    """Create database tables only when the recorded schema version is out of date"""
+    if not os.environ.get('DATABASE_URL'):
+        return
+    
     try:
-        from sqlalchemy import create_engine, text
+        # Reuse the application's pooled engine (built from DATABASE_URL set above)
+        from src.models.database import ensure_schema, schema_version
         
-        print("🔍 Testing database connection...")
-        engine = create_engine(database_url)
-        
-        # Test connection
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
-            print("✅ Database connection successful")
-        
-        # Import after connection test to avoid early import issues
-        from src.models.database import Base
-        
-        # Create tables if they don't exist
-        print("🔨 Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created/verified")
-        
-        # Test if tables were created by checking users table
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'users'"))
-            table_count = result.scalar()
-            if table_count > 0:
-                print("✅ Users table exists and is accessible")
-            else:
-                print("❌ Users table still not found after creation attempt")
+        if ensure_schema():
+            print(f"✅ Database tables and columns created/migrated (schema version {schema_version()})")
+        else:
+            print(f"✅ Database schema up to date (version {schema_version()})")
         
     except Exception as e:
         print(f"❌ Database connection/setup failed: {e}")
         # Don't raise here - let the app try to handle it
+
 # Load secrets when the module is imported (Lambda container reuse)
-load_secrets_from_aws()
+with cold_start_phase("secrets"):
+    load_secrets_from_aws()
+
+with cold_start_phase("database_schema"):
+    ensure_database_schema()
 
 # Import the app AFTER secrets are loaded
-from src.main import app
+with cold_start_phase("app_import"):
+    from src.main import app
 
 # Create Mangum handler
 mangum_handler = Mangum(app, lifespan="off")
 
+print(json.dumps({
+    "event": "Lambda cold start",
+    "total_ms": round((time.perf_counter() - cold_start_began) * 1000, 1),
+    **{f"{name}_ms": round(duration * 1000, 1) for name, duration in cold_start_phases.items()},
+}))
+
 def handler(event, context):
     """
     AWS Lambda handler function (main entry point)
@@ -0,0 +1,316 @@
+"""
+In-process stand-ins for the GitHub REST API and an OpenAI-compatible API
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import random
+import re
+import socket
+import tarfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+# Synthetic source per language: (extension, line template)
+LANGUAGE_SAMPLES = {
+    "shell": (".sh", 'echo "step {n}: $(date)" && cp "$SRC/file{n}" "$DST/"'),
+    "powershell": (".ps1", 'Write-Host "step {n}"; Copy-Item -Path "$env:SRC\\file{n}" -Destination $env:DST'),
+    "javascript": (".js", "const value{n} = await fetch(`${{base}}/items/{n}`).then(r => r.json());"),
+    "typescript": (".ts", "export const value{n}: number = compute({n}) * factor;"),
+    "go": (".go", 'fmt.Printf("step %d\\n", {n})'),
+    "ruby": (".rb", 'puts "step #{{{n}}}"'),
+    "java": (".java", 'System.out.println("step " + {n});'),
+}
+
+def git_sha(kind: str, content: bytes) -> str:
+    """Compute a git object SHA"""
+    return hashlib.sha1(f"{kind} {len(content)}\0".encode() + content).hexdigest()
+
+def find_free_port() -> int:
+    """Get a free local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class Latency:
+    """Fixed latency plus uniform jitter, in seconds"""
+    
+    def __init__(self, base: float = 0.0, jitter: float = 0.0):
+        self.base = base
+        self.jitter = jitter
+    
+    async def wait(self) -> None:
+        delay = self.base + random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class SyntheticRepo:
+    """Repository layout shared by every benchmark repo"""
+    
+    def __init__(
+        self,
+        files: int,
+        language_mix: Dict[str, float],
+        lines_per_file: int = 40,
+        noise_files: int = 20,
+        seed: int = 0
+    ):
+        rng = random.Random(seed)
+        languages = list(language_mix)
+        weights = [language_mix[lang] for lang in languages]
+        self.files: Dict[str, bytes] = {}
+        self.revision = 0
+        
+        for index in range(files):
+            language = rng.choices(languages, weights)[0]
+            extension, template = LANGUAGE_SAMPLES[language]
+            directory = f"pkg{index % 10}/sub{index % 3}"
+            body = "\n".join(template.format(n=n) for n in range(lines_per_file)) + "\n"
+            self.files[f"{directory}/script_{index}{extension}"] = body.encode()
+        
+        # Files that discovery has to skip
+        for index in range(noise_files):
+            self.files[f"docs/page_{index}.md"] = f"# Page {index}\n".encode()
+        
+        self._index()
+    
+    def _index(self) -> None:
+        self.blobs = {git_sha("blob", content): content for content in self.files.values()}
+        self.tree = [
+            {"path": path, "mode": "100644", "type": "blob", "sha": git_sha("blob", content), "size": len(content)}
+            for path, content in sorted(self.files.items())
+        ]
+        self.tree_sha = git_sha("tree", repr(self.tree).encode())
+        self.commit_sha = git_sha("commit", f"{self.tree_sha} {self.revision}".encode())
+    
+    def change_files(self, fraction: float, seed: int = 1) -> int:
+        """Edit a fraction of the convertible files as a new commit, returning how many changed"""
+        rng = random.Random(seed + self.revision)
+        convertible = [path for path in sorted(self.files) if not path.startswith("docs/")]
+        changed = rng.sample(convertible, min(len(convertible), round(len(convertible) * fraction)))
+        self.revision += 1
+        for path in changed:
+            self.files[path] += f"# revision {self.revision}\n".encode()
+        self._index()
+        return len(changed)
+    
+    def tarball(self, prefix: str) -> bytes:
+        """Build the gzipped tarball GitHub would serve for the branch"""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            for path, content in sorted(self.files.items()):
+                info = tarfile.TarInfo(f"{prefix}/{path}")
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content))
+        return buffer.getvalue()
+
+def create_github_app(repo: SyntheticRepo, latency: Latency, base_url: str) -> FastAPI:
+    """Fake GitHub REST API serving the synthetic repo under any owner/name"""
+    app = FastAPI()
+    tarballs: Dict[str, bytes] = {}
+    counter = {"objects": 0, "pulls": 0}
+    # Objects written by jobs, by SHA, so later runs can read back what earlier runs committed
+    blobs: Dict[str, bytes] = {}
+    trees: Dict[str, List[dict]] = {}
+    commits: Dict[str, str] = {}  # commit SHA -> tree SHA
+    refs: Dict[Tuple[str, str, str], str] = {}  # (owner, name, ref) -> commit SHA
+    
+    def new_sha() -> str:
+        counter["objects"] += 1
+        return hashlib.sha1(f"object-{counter['objects']}".encode()).hexdigest()
+    
+    def repo_url(owner: str, name: str) -> str:
+        return f"{base_url}/repos/{owner}/{name}"
+    
+    @app.middleware("http")
+    async def add_latency(request: Request, call_next):
+        await latency.wait()
+        response = await call_next(request)
+        response.headers["X-RateLimit-Remaining"] = "5000"
+        return response
+    
+    @app.get("/repos/{owner}/{name}")
+    async def get_repo(owner: str, name: str):
+        return {
+            "id": 1,
+            "name": name,
+            "full_name": f"{owner}/{name}",
+            "owner": {"login": owner},
+            "default_branch": "main",
+            "url": repo_url(owner, name),
+        }
+    
+    @app.get("/repos/{owner}/{name}/git/trees/{sha}")
+    async def get_tree(owner: str, name: str, sha: str):
+        tree_sha = commits.get(sha, sha)
+        if tree_sha in trees:
+            return {"sha": tree_sha, "tree": trees[tree_sha], "truncated": False, "url": f"{repo_url(owner, name)}/git/trees/{tree_sha}"}
+        # Any other SHA is the synthetic repo's current commit or tree
+        return {"sha": repo.tree_sha, "tree": repo.tree, "truncated": False, "url": f"{repo_url(owner, name)}/git/trees/{repo.tree_sha}"}
+    
+    @app.get("/repos/{owner}/{name}/git/blobs/{sha}")
+    async def get_blob(owner: str, name: str, sha: str):
+        content = repo.blobs.get(sha) or blobs.get(sha)
+        if content is None:
+            return JSONResponse({"message": "Not Found"}, status_code=404)
+        return {"sha": sha, "size": len(content), "encoding": "base64", "content": base64.b64encode(content).decode()}
+    
+    @app.get("/repos/{owner}/{name}/tarball/{ref:path}")
+    async def get_tarball(owner: str, name: str, ref: str):
+        if repo.commit_sha not in tarballs:
+            tarballs[repo.commit_sha] = repo.tarball(f"bench-repo-{repo.commit_sha[:7]}")
+        return Response(tarballs[repo.commit_sha], media_type="application/x-gzip")
+    
+    @app.get("/repos/{owner}/{name}/git/refs/{ref:path}")
+    async def get_ref(owner: str, name: str, ref: str):
+        return {
+            "ref": f"refs/{ref}",
+            "url": f"{repo_url(owner, name)}/git/refs/{ref}",
+            "object": {"sha": refs.get((owner, name, f"refs/{ref}"), repo.commit_sha), "type": "commit"},
+        }
+    
+    @app.post("/repos/{owner}/{name}/git/refs", status_code=201)
+    async def create_ref(owner: str, name: str, request: Request):
+        body = await request.json()
+        refs[(owner, name, body["ref"])] = body["sha"]
+        return {
+            "ref": body["ref"],
+            "url": f"{repo_url(owner, name)}/git/{body['ref']}",
+            "object": {"sha": body["sha"], "type": "commit"},
+        }
+    
+    @app.patch("/repos/{owner}/{name}/git/refs/{ref:path}")
+    async def update_ref(owner: str, name: str, ref: str, request: Request):
+        body = await request.json()
+        refs[(owner, name, f"refs/{ref}")] = body["sha"]
+        return {
+            "ref": f"refs/{ref}",
+            "url": f"{repo_url(owner, name)}/git/refs/{ref}",
+            "object": {"sha": body["sha"], "type": "commit"},
+        }
+    
+    @app.get("/repos/{owner}/{name}/git/commits/{sha}")
+    async def get_commit(owner: str, name: str, sha: str):
+        tree_sha = commits.get(sha, repo.tree_sha)
+        return {
+            "sha": sha,
+            "url": f"{repo_url(owner, name)}/git/commits/{sha}",
+            "tree": {"sha": tree_sha, "url": f"{repo_url(owner, name)}/git/trees/{tree_sha}"},
+        }
+    
+    @app.post("/repos/{owner}/{name}/git/blobs", status_code=201)
+    async def create_blob(owner: str, name: str, request: Request):
+        body = await request.json()
+        if body.get("encoding") == "base64":
+            content = base64.b64decode(body["content"])
+        else:
+            content = body["content"].encode("utf-8")
+        sha = git_sha("blob", content)
+        blobs[sha] = content
+        return {"sha": sha, "url": f"{repo_url(owner, name)}/git/blobs/{sha}"}
+    
+    @app.post("/repos/{owner}/{name}/git/trees", status_code=201)
+    async def create_tree(owner: str, name: str, request: Request):
+        body = await request.json()
+        base_sha = body.get("base_tree")
+        base = trees.get(base_sha, repo.tree if base_sha else [])
+        entries = {entry["path"]: entry for entry in base}
+        for entry in body.get("tree", []):
+            if entry.get("sha") is None and "content" not in entry:
+                entries.pop(entry["path"], None)  # Deletion
+                continue
+            if "content" in entry:
+                content = entry.pop("content").encode("utf-8")
+                entry["sha"] = git_sha("blob", content)
+                blobs[entry["sha"]] = content
+            entries[entry["path"]] = {**entry, "size": len(blobs.get(entry["sha"], b""))}
+        tree = [entries[path] for path in sorted(entries)]
+        sha = git_sha("tree", repr(tree).encode())
+        trees[sha] = tree
+        return {"sha": sha, "tree": tree, "url": f"{repo_url(owner, name)}/git/trees/{sha}"}
+    
+    @app.post("/repos/{owner}/{name}/git/commits", status_code=201)
+    async def create_commit(owner: str, name: str, request: Request):
+        body = await request.json()
+        sha = new_sha()
+        commits[sha] = body["tree"]
+        return {"sha": sha, "url": f"{repo_url(owner, name)}/git/commits/{sha}"}
+    
+    @app.post("/repos/{owner}/{name}/pulls", status_code=201)
+    async def create_pull(owner: str, name: str):
+        counter["pulls"] += 1
+        number = counter["pulls"]
+        return {
+            "id": number,
+            "number": number,
+            "url": f"{repo_url(owner, name)}/pulls/{number}",
+            "html_url": f"https://github.example/{owner}/{name}/pull/{number}",
+        }
+    
+    return app
+
+def create_openai_app(latency: Latency, tokens_per_second: Optional[float] = None) -> FastAPI:
+    """Fake OpenAI-compatible chat completions API"""
+    app = FastAPI()
+    
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt_tokens = sum(len(message["content"]) for message in body["messages"]) // 4
+        code = (
+            "def main():\n"
+            "    \"\"\"Converted entry point\"\"\"\n"
+            "    print(\"converted\")\n"
+        )
+        notes = "Used the standard library for all operations."
+        # Packed request: one JSON entry per "### File N: <path>" heading
+        paths = re.findall(r"^### File \d+: (.+)$", body["messages"][-1]["content"], re.MULTILINE)
+        if paths:
+            content = json.dumps({"files": [{"path": path, "code": code, "notes": notes} for path in paths]})
+            if body.get("response_format", {}).get("type") != "json_object":
+                # Models without JSON mode tend to fence their JSON
+                content = f"```json\n{content}\n```"
+        else:
+            content = f"```python\n{code}```\n{notes}"
+        completion_tokens = len(content) // 4
+        
+        await latency.wait()
+        if tokens_per_second:
+            await asyncio.sleep(completion_tokens / tokens_per_second)
+        
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+    
+    return app
+
+class BackgroundServer:
+    """Run an ASGI app with uvicorn on a background thread"""
+    
+    def __init__(self, app: FastAPI, port: int):
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+    
+    def start(self) -> None:
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+    
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
@@ -11,6 +11,7 @@ kubectl apply -f k8s/secrets.yaml
 kubectl apply -f k8s/configmap.yaml
 kubectl apply -f k8s/rbac.yaml
 kubectl apply -f k8s/deployment.yaml
+kubectl apply -f k8s/worker-deployment.yaml
 kubectl apply -f k8s/service.yaml
 kubectl apply -f k8s/hpa.yaml
 kubectl apply -f k8s/networkpolicy.yaml
@@ -17,9 +17,20 @@ class Settings(BaseSettings):
     # Database settings
     database_url: str = Field(..., description="Database connection URL")
     postgres_password: str = Field(..., description="PostgreSQL password")
+    database_pool_profile: str = Field(default="auto", description="Connection pool profile: 'server' (sized pool), 'lambda' (one warm connection per container), 'nullpool' (no pooling, e.g. behind RDS Proxy) or 'auto' (lambda inside AWS Lambda, otherwise server)")
+    database_pool_size: int = Field(default=10, description="Persistent connections per engine (server profile)")
+    database_max_overflow: int = Field(default=10, description="Extra connections opened under load (server profile)")
+    database_pool_timeout: float = Field(default=30.0, description="Seconds to wait for a pooled connection before failing")
+    database_pool_recycle: int = Field(default=1800, description="Seconds before a pooled connection is replaced (server profile)")
+    database_pool_pre_ping: bool = Field(default=True, description="Test pooled connections before use (server profile)")
+    database_pool_slow_checkout: float = Field(default=1.0, description="Log a warning when a pool checkout waits at least this many seconds")
     
     # Security settings
     encryption_key: str = Field(..., description="Fernet encryption key for storing sensitive data")
+    auth_cache_enabled: bool = Field(default=True, description="Cache API key authentication results in process")
+    auth_cache_ttl: float = Field(default=60.0, description="Seconds an authenticated API key stays cached")
+    auth_cache_negative_ttl: float = Field(default=10.0, description="Seconds a rejected API key stays cached")
+    auth_cache_max_entries: int = Field(default=10000, description="Maximum cached API keys before LRU eviction")
     
     # GitHub App settings (Secure)
     github_app_id: Optional[str] = Field(default=None, description="GitHub App ID")
@@ -28,18 +39,90 @@ class Settings(BaseSettings):
     github_webhook_secret: Optional[str] = Field(default=None, description="GitHub App webhook secret")
     github_client_id: Optional[str] = Field(default=None, description="GitHub App client ID")
     github_client_secret: Optional[str] = Field(default=None, description="GitHub App client secret")
+    github_token_refresh_margin: int = Field(default=300, description="Refresh cached installation tokens this many seconds before they expire")
+    github_http_timeout: float = Field(default=30.0, description="GitHub App API request timeout (seconds)")
+    github_http_connect_timeout: float = Field(default=10.0, description="GitHub App API connection timeout (seconds)")
+    github_http_max_connections: int = Field(default=20, description="Maximum pooled connections to the GitHub API")
+    github_http_max_keepalive_connections: int = Field(default=10, description="Maximum idle keep-alive connections to the GitHub API")
+    github_http_keepalive_expiry: float = Field(default=30.0, description="Idle keep-alive connection expiry (seconds)")
+    github_http2: bool = Field(default=False, description="Use HTTP/2 for GitHub App API calls (requires the h2 package)")
     
     # Legacy GitHub settings (fallback)
     github_token: Optional[str] = Field(default=None, description="GitHub personal access token (fallback only)")
     github_api_url: str = Field(default="https://api.github.com", description="GitHub API URL")
+    github_inline_blob_max_bytes: int = Field(default=65536, description="Converted files up to this size are embedded in the commit tree instead of uploaded as blobs")
+    github_blob_concurrency: int = Field(default=8, description="Maximum parallel blob uploads when committing larger files")
+    github_rate_limit_reserve: int = Field(default=50, description="GitHub API calls kept in reserve; at this remaining budget requests wait for the rate limit reset")
+    github_rate_limit_pace_threshold: float = Field(default=0.2, description="Fraction of the GitHub rate limit below which remaining calls are spread evenly until the reset")
+    github_rate_limit_max_wait: float = Field(default=3600.0, description="Longest a GitHub request may be deferred for rate limits before it fails (seconds)")
+    github_rate_limit_max_thread_wait: float = Field(default=5.0, description="Longest a GitHub call sleeps for rate limits in a worker thread; longer waits happen on the event loop")
+    github_rate_limit_max_retries: int = Field(default=3, description="Retries of a GitHub request rejected by a (secondary) rate limit")
+    github_conditional_requests: bool = Field(default=True, description="Revalidate repository, ref and tree reads with ETags (304s do not count against the rate limit)")
+    github_etag_cache_max_entries: int = Field(default=2000, description="Maximum cached GitHub responses kept for conditional requests")
+    github_etag_cache_max_bytes: int = Field(default=16 * 1024 * 1024, description="Maximum total response bytes kept for conditional requests")
+    github_etag_cache_ttl: float = Field(default=3600.0, description="Seconds a cached GitHub response is kept for conditional requests")
+    github_discovery_mode: str = Field(default="tree", description="File discovery mode: 'tree' (recursive Git Trees API), 'archive' (stream the branch tarball once and read contents from it) or 'contents' (per-directory listing)")
     
     # LLM settings
     openai_api_key: str = Field(..., description="OpenAI API key")
     llm_model: str = Field(default="gpt-4", description="LLM model to use")
+    llm_context_window: int = Field(default=0, description="Model context window in tokens (0 = infer from the model name)")
+    llm_json_mode: Optional[bool] = Field(default=None, description="Request JSON output for packed conversions (unset = infer from the model name)")
+    llm_base_url: Optional[str] = Field(default=None, description="OpenAI-compatible API base URL (defaults to the OpenAI API)")
+    llm_timeout: float = Field(default=120.0, description="LLM request timeout (seconds)")
+    llm_connect_timeout: float = Field(default=10.0, description="LLM connection timeout (seconds)")
+    llm_max_connections: int = Field(default=20, description="Maximum pooled connections to the LLM API")
+    llm_max_keepalive_connections: int = Field(default=10, description="Maximum idle keep-alive connections to the LLM API")
+    llm_keepalive_expiry: float = Field(default=30.0, description="Idle keep-alive connection expiry (seconds)")
+    llm_chunking_enabled: bool = Field(default=True, description="Split large source files into chunks converted in parallel")
+    llm_chunk_threshold_tokens: int = Field(default=2000, description="Estimated source tokens above which a file is converted in chunks")
+    llm_chunk_max_tokens: int = Field(default=1500, description="Maximum estimated source tokens per chunk")
+    llm_chunk_concurrency: int = Field(default=3, description="Maximum chunks of one file converted in parallel (on top of the per-job file concurrency)")
+    llm_packing_enabled: bool = Field(default=True, description="Convert several small files of the same language in one LLM request")
+    llm_packing_max_file_tokens: int = Field(default=800, description="Estimated source tokens up to which a file may be packed with others")
+    llm_packing_max_tokens: int = Field(default=2000, description="Maximum estimated source tokens per packed request")
+    llm_packing_max_files: int = Field(default=5, description="Maximum files per packed request")
+    llm_rate_limit_rpm: int = Field(default=0, description="LLM requests per minute budget (0 = learn it from x-ratelimit-* response headers)")
+    llm_rate_limit_tpm: int = Field(default=0, description="LLM tokens per minute budget (0 = learn it from x-ratelimit-* response headers)")
+    llm_rate_limit_max_requeues: int = Field(default=5, description="Times a rate limited (429) LLM request is requeued before the file fails")
+    llm_rate_limit_default_retry_after: float = Field(default=5.0, description="Seconds to pause LLM requests after a 429 without reset headers")
+    llm_retry_max_attempts: int = Field(default=4, description="Attempts per LLM request for transient failures (timeouts, connection errors and 5xx); 429s are requeued by the rate limit scheduler instead")
+    llm_retry_backoff_base: float = Field(default=1.0, description="Base of the jittered exponential backoff between LLM retries (seconds)")
+    llm_retry_backoff_max: float = Field(default=30.0, description="Maximum backoff between LLM retries (seconds)")
+    llm_request_deadline: float = Field(default=300.0, description="Deadline for an LLM request including retries and backoff, excluding time queued for rate limit budget (seconds)")
+    llm_hedging_enabled: bool = Field(default=False, description="Send a duplicate LLM request when one runs longer than the observed latency percentile")
+    llm_hedge_percentile: float = Field(default=95.0, description="Observed latency percentile after which a slow LLM request is hedged")
+    llm_hedge_min_samples: int = Field(default=20, description="Successful requests observed before hedging starts")
+    llm_hedge_min_delay: float = Field(default=2.0, description="Shortest wait before hedging an LLM request (seconds)")
+    llm_latency_window: int = Field(default=200, description="Recent LLM request latencies kept per call type for hedging")
+    llm_packing_max_output_tokens: int = Field(default=8000, description="Upper bound on completion tokens for a packed request (also capped by the model's context window)")
     
     # Conversion settings
     max_file_size: int = Field(default=10000, description="Maximum file size to process (bytes)")
     max_files_per_repo: int = Field(default=50, description="Maximum files to process per repository")
+    conversion_concurrency: int = Field(default=5, description="Maximum files converted in parallel per job (1 = sequential)")
+    
+    # Job execution settings
+    job_execution_mode: str = Field(default="background", description="Job execution: 'background' (in the API process) or 'queue' (durable queue drained by src.worker)")
+    worker_concurrency: int = Field(default=2, description="Jobs processed in parallel by each worker process")
+    worker_poll_interval: float = Field(default=2.0, description="Seconds an idle worker waits before polling the queue again")
+    job_lease_seconds: int = Field(default=300, description="Seconds a claimed job stays leased without a heartbeat")
+    job_heartbeat_interval: float = Field(default=30.0, description="Seconds between worker heartbeats for a running job")
+    job_max_attempts: int = Field(default=3, description="Maximum attempts before a queued job is marked failed")
+    job_retry_delay: int = Field(default=60, description="Base delay (seconds) before retrying a failed job, multiplied by attempt number")
+    
+    # Health check settings
+    health_check_interval: float = Field(default=30.0, description="Seconds between background dependency health checks")
+    health_check_timeout: float = Field(default=5.0, description="Timeout (seconds) for each dependency health check")
+    
+    # Job progress settings
+    job_progress_flush_interval: float = Field(default=1.0, description="Minimum seconds between writes of per-file progress to the job row")
+    job_events_poll_interval: float = Field(default=2.0, description="Seconds an idle job event stream waits before re-reading the job row (jobs running in other processes)")
+    
+    # Conversion cache settings
+    conversion_cache_enabled: bool = Field(default=True, description="Reuse conversions of unchanged files across jobs")
+    conversion_cache_max_entries: int = Field(default=10000, description="Maximum cached conversions before LRU eviction")
+    conversion_cache_evict_every: int = Field(default=100, description="Cache writes between LRU eviction passes (the cache may overshoot its limit by this many entries)")
     
     # Supported file extensions and their language mappings
     supported_extensions: dict = Field(
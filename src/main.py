@@ -7,17 +7,17 @@ import structlog
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Security
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_
 from typing import Optional, List
 import json
 import uuid
 from datetime import datetime
 
 from .config import settings
-from .models.database import create_tables, get_db, SessionLocal, User, ConversionJob
+from .models.database import create_tables, get_async_db, get_pool_stats, AsyncSessionLocal, User, ConversionJob
 from .models.schemas import (
     HealthResponse, 
     ConversionRequest, 
@@ -28,11 +28,19 @@ from .models.schemas import (
     JobStatusResponse
 )
 from .services.auth_service import AuthService
-from .services.conversion_service import ConversionService
-from .services.github_service import GitHubService
+from .services.conversion_cache import ConversionCache
 from .services.github_app_service import GitHubAppService
-from .services.llm_service import LLMService
+from .services.health_service import HealthMonitor
+from .services.job_events import (
+    TERMINAL_STATUSES,
+    JobProgress,
+    format_sse,
+    job_event_broker,
+    job_state,
+    publish_job_status,
+)
 from .utils.logging import setup_logging
+from .utils.pagination import decode_cursor, encode_cursor
 
 # Setup structured logging
 setup_logging()
@@ -41,6 +49,8 @@ logger = structlog.get_logger()
 # Initialize services
 auth_service = AuthService()
 github_app_service = GitHubAppService()
+conversion_cache = ConversionCache() if settings.conversion_cache_enabled else None
+health_monitor = HealthMonitor(github_app_service)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -48,9 +58,14 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Multi-tenant Code Conversion MCP Server")
     create_tables()
+    health_monitor.start()
     yield
     # Shutdown
     logger.info("Shutting down Multi-tenant Code Conversion MCP Server")
+    await health_monitor.stop()
+    from .services.llm_service import close_llm_clients
+    await close_llm_clients()
+    await github_app_service.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -85,6 +100,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Security
@@ -92,7 +108,7 @@ security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current authenticated user"""
     if not credentials:
@@ -118,7 +134,9 @@ async def root():
             "register": "/auth/register",
             "convert": "/convert",
             "jobs": "/jobs",
-            "health": "/health"
+            "health": "/health",
+            "liveness": "/health/live",
+            "readiness": "/health/ready"
         }
     }
 
@@ -139,43 +157,56 @@ async def get_supported_languages():
 
 @app.get("/health", response_model=HealthResponse, tags=["health"])
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (last background check of database, LLM and GitHub)"""
     try:
-        # Test database connection
-        db_healthy = True
-        try:
-            with SessionLocal() as db:
-                db.execute(text("SELECT 1"))
-        except Exception:
-            db_healthy = False
-        
-        # Test LLM service
-        llm_service = LLMService(settings.openai_api_key, settings.llm_model)
-        llm_healthy = await llm_service.health_check()
-        
-        overall_healthy = db_healthy and llm_healthy
-        
-        return HealthResponse(
-            status="healthy" if overall_healthy else "degraded",
-            services={
-                "llm": "healthy" if llm_healthy else "unhealthy",
-                "database": "healthy" if db_healthy else "unhealthy"
-            }
-        )
+        services = await health_monitor.snapshot()
+        return HealthResponse(status=health_monitor.status, services=services)
     except Exception as e:
         logger.error("Health check failed", error=str(e))
         return HealthResponse(
             status="unhealthy",
             services={
                 "llm": "unknown",
-                "database": "unknown"
+                "database": "unknown",
+                "github": "unknown"
             }
         )
 
+@app.get("/health/live", tags=["health"])
+async def liveness_check():
+    """Liveness probe: the process is serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready", response_model=HealthResponse, tags=["health"])
+async def readiness_check(response: Response):
+    """Readiness probe: served from the background health monitor"""
+    services = await health_monitor.snapshot()
+    if not health_monitor.ready:
+        response.status_code = 503
+    return HealthResponse(status=health_monitor.status, services=services)
+
+@app.get("/metrics/database-pool", tags=["health"])
+async def database_pool_metrics(current_user: User = Depends(get_current_user)):
+    """Database pool profile, checkout wait times and saturation"""
+    return get_pool_stats()
+
+@app.get("/metrics/github", tags=["health"])
+async def github_rate_limit_metrics(current_user: User = Depends(get_current_user)):
+    """GitHub API budget per installation, pacing and conditional request hits"""
+    from .services.github_transport import get_github_rate_limit_stats
+    return get_github_rate_limit_stats()
+
+@app.get("/metrics/llm", tags=["health"])
+async def llm_scheduler_metrics(current_user: User = Depends(get_current_user)):
+    """LLM request queue depth, rate limit wait times, remaining budgets, retries and hedging"""
+    from .services.llm_resilience import get_llm_resilience_stats
+    from .services.llm_scheduler import get_llm_scheduler_stats
+    return {**get_llm_scheduler_stats(), **get_llm_resilience_stats()}
+
 @app.post("/auth/register", response_model=UserRegistrationResponse, tags=["authentication"])
 async def register_user(
     request: UserRegistrationRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register a new user"""
     try:
@@ -208,7 +239,7 @@ async def convert_repository(
     request: ConversionRequest,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Start code conversion job"""
     try:
@@ -227,19 +258,22 @@ async def convert_repository(
             target_branch=target_branch,
             source_languages=json.dumps(request.source_languages) if request.source_languages else None,
             target_language=request.target_language,
+            incremental=request.incremental,
             status="pending"
         )
         
         db.add(job)
-        db.commit()
-        db.refresh(job)
-        
-        # Start background conversion task
-        background_tasks.add_task(
-            process_conversion_job,
-            job_id=str(job.id),
-            user_id=str(current_user.id)
-        )
+        await db.commit()
+        await db.refresh(job)
+        
+        # Queue mode: a worker process claims the pending job from the database
+        if settings.job_execution_mode != "queue":
+            # Start background conversion task
+            background_tasks.add_task(
+                process_conversion_job,
+                job_id=str(job.id),
+                user_id=str(current_user.id)
+            )
         
         logger.info("Conversion job created", 
                    job_id=str(job.id), 
@@ -260,14 +294,15 @@ async def convert_repository(
 async def get_job_status(
     job_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get conversion job status"""
     try:
-        job = db.query(ConversionJob).filter(
+        result = await db.execute(select(ConversionJob).filter(
             ConversionJob.id == job_id,
             ConversionJob.user_id == current_user.id
-        ).first()
+        ))
+        job = result.scalars().first()
         
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
@@ -281,6 +316,10 @@ async def get_job_status(
             target_branch=job.target_branch,
             files_processed=job.files_processed,
             files_converted=job.files_converted,
+            files_total=job.files_total,
+            stage=job.stage,
+            incremental=bool(job.incremental),
+            source_commit_sha=job.source_commit_sha,
             pr_url=job.pr_url,
             error_message=job.error_message,
             created_at=job.created_at,
@@ -294,18 +333,102 @@ async def get_job_status(
         logger.error("Failed to get job status", job_id=job_id, error=str(e))
         raise HTTPException(status_code=500, detail="Failed to get job status")
 
+@app.get("/jobs/{job_id}/events", tags=["jobs"])
+async def stream_job_events(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stream live job progress as Server-Sent Events until the job finishes"""
+    try:
+        result = await db.execute(select(ConversionJob).filter(
+            ConversionJob.id == job_id,
+            ConversionJob.user_id == current_user.id
+        ))
+        job = result.scalars().first()
+    except Exception as e:
+        logger.error("Failed to get job for event stream", job_id=job_id, error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to get job status")
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    state = job_state(job)
+    # Don't hold a pooled connection for the lifetime of the stream
+    await db.close()
+    
+    return StreamingResponse(
+        job_event_stream(str(job.id), state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def job_event_stream(job_id: str, state: dict):
+    """Relay in-process job events, re-reading the job row when idle (jobs run by other processes)"""
+    yield format_sse("status", state)
+    if state["status"] in TERMINAL_STATUSES:
+        return
+    
+    async with job_event_broker.subscribe(job_id) as events:
+        while True:
+            try:
+                event, data = await asyncio.wait_for(events.get(), timeout=settings.job_events_poll_interval)
+            except asyncio.TimeoutError:
+                async with AsyncSessionLocal() as db:
+                    job = await db.get(ConversionJob, uuid.UUID(job_id))
+                if not job:
+                    return
+                latest = job_state(job)
+                if latest == state:
+                    yield ": keep-alive\n\n"
+                    continue
+                event, data = "status", latest
+            
+            if event == "status":
+                state = data
+            yield format_sse(event, data)
+            if state["status"] in TERMINAL_STATUSES:
+                return
+
 @app.get("/jobs", response_model=List[JobStatusResponse], tags=["jobs"])
 async def list_user_jobs(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = 10,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
-    """List user's conversion jobs"""
+    """List user's conversion jobs, newest first
+    
+    Pass the X-Next-Cursor response header back as `cursor` for the next page;
+    `offset` is kept for backwards compatibility.
+    """
     try:
-        jobs = db.query(ConversionJob).filter(
+        query = select(ConversionJob).filter(
             ConversionJob.user_id == current_user.id
-        ).order_by(ConversionJob.created_at.desc()).offset(offset).limit(limit).all()
+        ).order_by(ConversionJob.created_at.desc(), ConversionJob.id.desc())
+        
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = decode_cursor(cursor)
+                cursor_id = uuid.UUID(cursor_id)
+            except (ValueError, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.filter(
+                tuple_(ConversionJob.created_at, ConversionJob.id) < tuple_(cursor_created_at, cursor_id)
+            )
+        elif offset:
+            query = query.offset(offset)
+        
+        # One extra row tells whether there is a next page
+        result = await db.execute(query.limit(limit + 1))
+        jobs = result.scalars().all()
+        
+        if len(jobs) > limit:
+            jobs = jobs[:limit]
+            if jobs:
+                response.headers["X-Next-Cursor"] = encode_cursor(jobs[-1].created_at, jobs[-1].id)
         
         return [
             JobStatusResponse(
@@ -317,6 +440,10 @@ async def list_user_jobs(
                 target_branch=job.target_branch,
                 files_processed=job.files_processed,
                 files_converted=job.files_converted,
+                files_total=job.files_total,
+                stage=job.stage,
+                incremental=bool(job.incremental),
+                source_commit_sha=job.source_commit_sha,
                 pr_url=job.pr_url,
                 error_message=job.error_message,
                 created_at=job.created_at,
@@ -326,6 +453,8 @@ async def list_user_jobs(
             for job in jobs
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Failed to list jobs", user_id=str(current_user.id), error=str(e))
         raise HTTPException(status_code=500, detail="Failed to list jobs")
@@ -333,7 +462,7 @@ async def list_user_jobs(
 @app.post("/auth/github/callback", tags=["authentication"])
 async def github_oauth_callback(
     request: GitHubAuthRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle GitHub OAuth callback and link installation"""
     try:
@@ -349,7 +478,8 @@ async def github_oauth_callback(
         github_username = user_info.get('login')
         
         # Find user by GitHub username
-        user = db.query(User).filter(User.github_username == github_username).first()
+        result = await db.execute(select(User).filter(User.github_username == github_username))
+        user = result.scalars().first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found. Please register first.")
         
@@ -374,7 +504,7 @@ async def github_oauth_callback(
 @app.post("/webhooks/github", tags=["webhooks"])
 async def github_webhook(
     request: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle GitHub App webhook events"""
     try:
@@ -388,7 +518,8 @@ async def github_webhook(
             username = account.get('login')
             
             # Find user and link installation
-            user = db.query(User).filter(User.github_username == username).first()
+            result = await db.execute(select(User).filter(User.github_username == username))
+            user = result.scalars().first()
             if user:
                 await auth_service.link_github_installation(
                     db=db,
@@ -436,7 +567,7 @@ async def get_github_app_install_url(
 async def link_github_installation(
     request: dict,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Manually link GitHub App installation to current user"""
     try:
@@ -445,12 +576,14 @@ async def link_github_installation(
         if not installation_id:
             raise HTTPException(status_code=400, detail="Installation ID is required")
         
-        # Update user's installation ID
-        current_user.github_installation_id = installation_id
-        current_user.updated_at = datetime.utcnow()
+        # Update user's installation ID (the authenticated user may come from the auth cache)
+        user = await db.merge(current_user)
+        user.github_installation_id = installation_id
+        user.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await db.refresh(user)
+        auth_service.invalidate_user(user)
         
         logger.info("GitHub installation linked", 
                    user_id=str(current_user.id), 
@@ -468,77 +601,114 @@ async def link_github_installation(
                     error=str(e))
         raise HTTPException(status_code=500, detail="Failed to link installation")
 
-async def process_conversion_job(job_id: str, user_id: str):
-    """Background task to process conversion job"""
-    db = next(get_db())
-    
-    try:
-        # Get job and user
-        job = db.query(ConversionJob).filter(ConversionJob.id == job_id).first()
-        user = db.query(User).filter(User.id == user_id).first()
-        
-        if not job or not user:
-            logger.error("Job or user not found", job_id=job_id, user_id=user_id)
-            return
-        
-        # Update job status
-        job.status = "processing"
-        job.started_at = datetime.utcnow()
-        db.commit()
-        
-        # Get user's GitHub installation token
-        if user.github_installation_id:
-            try:
-                github_token = await github_app_service.get_installation_token(user.github_installation_id)
-            except Exception as e:
-                logger.error("Failed to get installation token", installation_id=user.github_installation_id, error=str(e))
-                # Fallback to stored token if available
-                github_token = await auth_service.get_user_github_token(user)
-        else:
-            # Use stored token if no installation linked
+async def find_baseline_job(job: ConversionJob) -> Optional[ConversionJob]:
+    """Most recent completed job with a source snapshot for the same repository, branch and target language"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(ConversionJob).filter(
+            ConversionJob.user_id == job.user_id,
+            ConversionJob.repo_owner == job.repo_owner,
+            ConversionJob.repo_name == job.repo_name,
+            ConversionJob.source_branch == job.source_branch,
+            ConversionJob.target_language == job.target_language,
+            ConversionJob.status == "completed",
+            ConversionJob.source_commit_sha.isnot(None),
+            ConversionJob.id != job.id
+        ).order_by(ConversionJob.completed_at.desc()).limit(1))
+        return result.scalars().first()
+
+async def run_conversion_job(job: ConversionJob, user: User, progress: Optional[JobProgress] = None) -> None:
+    """Run the repository conversion for a job (raises on failure)"""
+    # Get user's GitHub installation token
+    if user.github_installation_id:
+        try:
+            github_token = await github_app_service.get_installation_token(user.github_installation_id)
+        except Exception as e:
+            logger.error("Failed to get installation token", installation_id=user.github_installation_id, error=str(e))
+            # Fallback to stored token if available
             github_token = await auth_service.get_user_github_token(user)
-        
-        # Initialize services
-        github_service = GitHubService(github_token)
-        llm_service = LLMService(settings.openai_api_key, settings.llm_model)
-        conversion_service = ConversionService(github_service, llm_service)
-        
-        # Parse source languages
-        source_languages = None
-        if job.source_languages:
-            source_languages = json.loads(job.source_languages)
-        
-        # Process repository
-        await conversion_service.process_repository(
-            repo_owner=job.repo_owner,
-            repo_name=job.repo_name,
-            source_branch=job.source_branch,
-            target_branch=job.target_branch,
-            source_languages=source_languages,
-            target_language=job.target_language,
-            task_id=job_id
-        )
-        
-        # Update job as completed
-        job = db.query(ConversionJob).filter(ConversionJob.id == job_id).first()
-        if job and job.status == "processing":
-            job.status = "completed"
-            job.completed_at = datetime.utcnow()
-            db.commit()
-        
-    except Exception as e:
-        logger.error("Conversion job failed", job_id=job_id, error=str(e))
-        
-        # Update job as failed
-        job = db.query(ConversionJob).filter(ConversionJob.id == job_id).first()
-        if job:
-            job.status = "failed"
-            job.error_message = str(e)
-            job.completed_at = datetime.utcnow()
-            db.commit()
+    else:
+        # Use stored token if no installation linked
+        github_token = await auth_service.get_user_github_token(user)
+    
+    # Conversion dependencies (PyGithub, OpenAI) load on first use to keep cold starts fast
+    from .services.conversion_service import ConversionService
+    from .services.github_service import GitHubService
+    from .services.github_transport import installation_budget_key
+    from .services.llm_service import LLMService
     
-    finally:
-        db.close()
+    # Initialize services
+    github_service = GitHubService(
+        github_token,
+        budget_key=installation_budget_key(user.github_installation_id) if user.github_installation_id else None
+    )
+    llm_service = LLMService(settings.openai_api_key, settings.llm_model)
+    conversion_service = ConversionService(github_service, llm_service, conversion_cache)
+    
+    # Parse source languages
+    source_languages = None
+    if job.source_languages:
+        source_languages = json.loads(job.source_languages)
+    
+    # Incremental jobs diff against the last completed job; without one every file is converted
+    baseline_job = None
+    if job.incremental:
+        baseline_job = await find_baseline_job(job)
+        if not baseline_job:
+            logger.info("No baseline job for incremental conversion, converting all files", job_id=str(job.id))
+    
+    # Process repository
+    await conversion_service.process_repository(
+        repo_owner=job.repo_owner,
+        repo_name=job.repo_name,
+        source_branch=job.source_branch,
+        target_branch=job.target_branch,
+        source_languages=source_languages,
+        target_language=job.target_language,
+        task_id=str(job.id),
+        progress=progress or JobProgress(str(job.id)),
+        baseline_job=baseline_job
+    )
+
+async def process_conversion_job(job_id: str, user_id: str):
+    """Background task to process conversion job"""
+    async with AsyncSessionLocal() as db:
+        try:
+            # Get job and user
+            job = await db.get(ConversionJob, job_id)
+            user = await db.get(User, user_id)
+            
+            if not job or not user:
+                logger.error("Job or user not found", job_id=job_id, user_id=user_id)
+                return
+            
+            # Update job status
+            job.status = "processing"
+            job.started_at = datetime.utcnow()
+            await db.commit()
+            publish_job_status(job)
+            
+            await run_conversion_job(job, user)
+            
+            # Update job as completed
+            job = await db.get(ConversionJob, job_id, populate_existing=True)
+            if job and job.status == "processing":
+                job.status = "completed"
+                job.completed_at = datetime.utcnow()
+                await db.commit()
+                publish_job_status(job)
+            
+        except Exception as e:
+            logger.error("Conversion job failed", job_id=job_id, error=str(e))
+            
+            # Update job as failed
+            await db.rollback()
+            job = await db.get(ConversionJob, job_id, populate_existing=True)
+            if job:
+                job.status = "failed"
+                job.error_message = str(e)
+                job.completed_at = datetime.utcnow()
+                await db.commit()
+                publish_job_status(job)
 
 @app.get("/openapi.json", include_in_schema=False)
 async def get_openapi_json():
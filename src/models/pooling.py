@@ -0,0 +1,135 @@
+"""
+Connection pool profiles and checkout metrics for the database engines
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+import structlog
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from ..config import settings
+
+logger = structlog.get_logger()
+
+POOL_PROFILES = ("server", "lambda", "nullpool")
+
+# Lambda containers serve one request at a time; keep one warm connection per engine
+LAMBDA_POOL_SIZE = 1
+LAMBDA_MAX_OVERFLOW = 1
+# Frozen containers can hold connections the server has already dropped
+LAMBDA_POOL_RECYCLE = 300
+
+def resolve_pool_profile() -> str:
+    """Pool profile from settings ('auto' picks 'lambda' inside AWS Lambda)"""
+    profile = settings.database_pool_profile
+    if profile == "auto":
+        return "lambda" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "server"
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Unknown database pool profile '{profile}' (choose from auto, {', '.join(POOL_PROFILES)})")
+    return profile
+
+class PoolMetrics:
+    """Checkout wait time and saturation for one engine's pool"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: Optional[Engine] = None
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        
+        if timed_out:
+            logger.error("Database pool checkout timed out", engine=self.name, wait=round(wait, 3), **self.capacity())
+        elif wait >= settings.database_pool_slow_checkout:
+            logger.warning("Slow database pool checkout", engine=self.name, wait=round(wait, 3), **self.capacity())
+    
+    def capacity(self) -> Dict[str, Any]:
+        """Current pool occupancy"""
+        pool = self.engine.pool if self.engine is not None else None
+        if not isinstance(pool, QueuePool):
+            return {}
+        
+        checked_out = pool.checkedout()
+        max_overflow = pool._max_overflow
+        capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+        return {
+            "pool_size": pool.size(),
+            "checked_out": checked_out,
+            "overflow": max(pool.overflow(), 0),
+            "capacity": capacity,
+            "saturation": round(checked_out / capacity, 3) if capacity else None,
+        }
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+        stats.update(self.capacity())
+        return stats
+
+class InstrumentedPoolMixin:
+    """Times how long each checkout waits for a pooled connection"""
+    
+    metrics: PoolMetrics
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+def pool_options(database_url: str, metrics: PoolMetrics, is_async: bool = False) -> Dict[str, Any]:
+    """Engine keyword arguments for the configured pool profile"""
+    # SQLite (local development) keeps SQLAlchemy's default pooling
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    
+    profile = resolve_pool_profile()
+    if profile == "nullpool":
+        # Every session opens its own connection (e.g. behind RDS Proxy or PgBouncer)
+        return {"poolclass": NullPool}
+    
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+    # A subclass per engine, so pools recreated on dispose() keep their metrics
+    poolclass = type(f"Instrumented{base.__name__}", (InstrumentedPoolMixin, base), {"metrics": metrics})
+    
+    if profile == "lambda":
+        return {
+            "poolclass": poolclass,
+            "pool_size": LAMBDA_POOL_SIZE,
+            "max_overflow": LAMBDA_MAX_OVERFLOW,
+            "pool_timeout": settings.database_pool_timeout,
+            "pool_recycle": LAMBDA_POOL_RECYCLE,
+            "pool_pre_ping": True,
+        }
+    
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
@@ -15,6 +15,7 @@ class ConversionRequest(BaseModel):
     exclude_patterns: Optional[List[str]] = Field(default=None, description="File patterns to exclude (e.g., ['*.test.*', 'node_modules/**'])")
     target_language: str = Field(default="python", description="Target language for conversion")
     source_languages: Optional[List[str]] = Field(default=None, description="Source languages to convert (e.g., ['shell', 'typescript']). If None, auto-detects and converts all supported languages")
+    incremental: bool = Field(default=False, description="Only reconvert files changed since the last completed job for this repository, branch and target language")
     
     class Config:
         json_schema_extra = {
@@ -93,6 +94,10 @@ class JobStatusResponse(BaseModel):
     target_branch: str
     files_processed: int
     files_converted: int
+    files_total: Optional[int] = None
+    stage: Optional[str] = None
+    incremental: bool = False
+    source_commit_sha: Optional[str] = None
     pr_url: Optional[str] = None
     error_message: Optional[str] = None
     created_at: datetime
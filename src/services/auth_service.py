@@ -1,15 +1,18 @@
 """
 Authentication and authorization service
 """
+import hashlib
 import secrets
 import bcrypt
 from cryptography.fernet import Fernet
 from typing import Optional
 import structlog
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from ..models.database import User, get_db
+from ..models.database import User
 from ..config import settings
+from ..utils.ttl_cache import TTLCache
 import os
 from datetime import datetime
 
@@ -28,6 +31,23 @@ class AuthService:
             # Generate new key (already returns bytes)
             self.encryption_key = Fernet.generate_key()
         self.cipher = Fernet(self.encryption_key)
+        
+        # Authenticated users (or None for rejected keys) by API key hash
+        self._auth_cache = TTLCache(settings.auth_cache_max_entries, settings.auth_cache_ttl)
+    
+    @staticmethod
+    def _api_key_hash(api_key: str) -> str:
+        """Cache key for an API key (plaintext keys are never held in the cache)"""
+        return hashlib.sha256(api_key.encode()).hexdigest()
+    
+    def invalidate_api_key(self, api_key: str) -> None:
+        """Drop a cached authentication result for an API key"""
+        self._auth_cache.pop(self._api_key_hash(api_key))
+    
+    def invalidate_user(self, user: User) -> None:
+        """Drop the cached authentication result for a user"""
+        if user.api_key:
+            self.invalidate_api_key(user.api_key)
     
     def generate_api_key(self) -> str:
         """Generate a secure API key for user"""
@@ -43,14 +63,15 @@ class AuthService:
     
     async def create_user(
         self, 
-        db: Session,
+        db: AsyncSession,
         email: str, 
         github_username: str
     ) -> User:
         """Create a new user (GitHub authentication handled separately via OAuth)"""
         try:
             # Check if user already exists
-            existing_user = db.query(User).filter(User.email == email).first()
+            result = await db.execute(select(User).filter(User.email == email))
+            existing_user = result.scalars().first()
             if existing_user:
                 raise ValueError("User with this email already exists")
             
@@ -65,30 +86,46 @@ class AuthService:
             )
             
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             
             logger.info("User created successfully", email=email, github_username=github_username)
             return user
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error("Failed to create user", email=email, error=str(e))
             raise
     
-    async def authenticate_user(self, db: Session, api_key: str) -> Optional[User]:
+    async def authenticate_user(self, db: AsyncSession, api_key: str) -> Optional[User]:
         """Authenticate user by API key"""
+        cache_key = self._api_key_hash(api_key)
+        if settings.auth_cache_enabled:
+            found, user = self._auth_cache.get(cache_key)
+            if found:
+                return user
+        
         try:
-            user = db.query(User).filter(
+            result = await db.execute(select(User).filter(
                 User.api_key == api_key,
                 User.is_active == True
-            ).first()
+            ))
+            user = result.scalars().first()
             
             if user:
+                # Detach so the cached user outlives this request's session
+                db.expunge(user)
                 logger.info("User authenticated", user_id=str(user.id), email=user.email)
             else:
                 logger.warning("Authentication failed", api_key=api_key[:10] + "...")
             
+            if settings.auth_cache_enabled:
+                self._auth_cache.set(
+                    cache_key,
+                    user,
+                    ttl=None if user else settings.auth_cache_negative_ttl
+                )
+            
             return user
             
         except Exception as e:
@@ -104,7 +141,7 @@ class AuthService:
     
     async def update_github_token(
         self, 
-        db: Session,
+        db: AsyncSession,
         user: User, 
         new_token: str
     ) -> User:
@@ -113,20 +150,21 @@ class AuthService:
             encrypted_token = self.encrypt_github_token(new_token)
             user.github_token_encrypted = encrypted_token
             
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             
+            self.invalidate_user(user)
             logger.info("GitHub token updated", user_id=str(user.id))
             return user
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error("Failed to update GitHub token", user_id=str(user.id), error=str(e))
             raise
 
     async def link_github_installation(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user: User, 
         installation_id: str, 
         oauth_token: str = None
@@ -140,20 +178,21 @@ class AuthService:
                 user.github_token_encrypted = encrypted_token
             
             user.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             
+            self.invalidate_user(user)
             logger.info("GitHub installation linked", user_id=str(user.id), installation_id=installation_id)
             return user
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error("Failed to link GitHub installation", user_id=str(user.id), error=str(e))
             raise
         
     async def link_github_installation(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user: User, 
         installation_id: str, 
         oauth_token: str = None
@@ -167,16 +206,17 @@ class AuthService:
                 user.github_token_encrypted = encrypted_token
             
             user.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             
+            self.invalidate_user(user)
             logger.info("GitHub installation linked", 
                        user_id=str(user.id), 
                        installation_id=installation_id)
             return user
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error("Failed to link GitHub installation", 
                         user_id=str(user.id), 
                         error=str(e))
@@ -0,0 +1,123 @@
+"""
+Content-addressed cache of LLM conversions backed by the database
+"""
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Optional, Tuple
+import structlog
+
+from ..config import settings
+from ..models.database import SessionLocal, ConversionCacheEntry
+
+logger = structlog.get_logger()
+
+class ConversionCache:
+    """Persistent LRU cache of conversions keyed by git blob SHA"""
+    
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.conversion_cache_max_entries
+        self.hits = 0
+        self.misses = 0
+        # Counting rows on every write is expensive, so eviction runs once per batch of writes
+        self._writes = 0
+    
+    @staticmethod
+    def make_key(
+        blob_sha: str,
+        source_language: str,
+        target_language: str,
+        llm_model: str,
+        prompt_version: str
+    ) -> str:
+        """Build the cache key from its components"""
+        raw = "\0".join([blob_sha, source_language, target_language, llm_model, prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def stats(self) -> dict:
+        """Get hit/miss counters for this process"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+    
+    async def get(self, cache_key: str) -> Optional[Tuple[str, str, Optional[str]]]:
+        """Look up (original_content, converted_code, conversion_notes), treating cache errors as misses"""
+        try:
+            cached = await asyncio.to_thread(self._get_sync, cache_key)
+        except Exception as e:
+            logger.warning("Conversion cache lookup failed", error=str(e))
+            cached = None
+        
+        if cached:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return cached
+    
+    async def put(
+        self,
+        cache_key: str,
+        blob_sha: str,
+        source_language: str,
+        target_language: str,
+        llm_model: str,
+        prompt_version: str,
+        original_content: str,
+        converted_code: str,
+        conversion_notes: Optional[str]
+    ) -> None:
+        """Store a conversion, periodically evicting least recently used entries over the limit"""
+        entry = ConversionCacheEntry(
+            cache_key=cache_key,
+            blob_sha=blob_sha,
+            source_language=source_language,
+            target_language=target_language,
+            llm_model=llm_model,
+            prompt_version=prompt_version,
+            original_content=original_content,
+            converted_code=converted_code,
+            conversion_notes=conversion_notes,
+            size_bytes=len(original_content.encode("utf-8")) + len(converted_code.encode("utf-8"))
+        )
+        self._writes += 1
+        evict = self._writes % max(1, settings.conversion_cache_evict_every) == 0
+        try:
+            await asyncio.to_thread(self._put_sync, entry, evict)
+        except Exception as e:
+            logger.warning("Conversion cache store failed", error=str(e))
+    
+    def _get_sync(self, cache_key: str) -> Optional[Tuple[str, str, Optional[str]]]:
+        with SessionLocal() as db:
+            entry = db.query(ConversionCacheEntry).filter(
+                ConversionCacheEntry.cache_key == cache_key
+            ).first()
+            
+            if not entry:
+                return None
+            
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_accessed_at = datetime.utcnow()
+            db.commit()
+            
+            return entry.original_content, entry.converted_code, entry.conversion_notes
+    
+    def _put_sync(self, entry: ConversionCacheEntry, evict: bool) -> None:
+        with SessionLocal() as db:
+            db.merge(entry)
+            db.commit()
+            
+            if not evict:
+                return
+            overflow = db.query(ConversionCacheEntry).count() - self.max_entries
+            if overflow > 0:
+                stale_keys = db.query(ConversionCacheEntry.cache_key).order_by(
+                    ConversionCacheEntry.last_accessed_at.asc()
+                ).limit(overflow).subquery()
+                evicted = db.query(ConversionCacheEntry).filter(
+                    ConversionCacheEntry.cache_key.in_(stale_keys.select())
+                ).delete(synchronize_session=False)
+                db.commit()
+                logger.info("Conversion cache evicted entries", count=evicted)
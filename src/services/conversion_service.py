@@ -2,23 +2,37 @@
 Main conversion service orchestrating the entire process
 """
 import asyncio
-from typing import List
+import json
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
 import structlog
+from github.ContentFile import ContentFile
 
-from .github_service import GitHubService
+from github.Repository import Repository
+
+from .github_service import GitHubService, RepoFile, git_blob_sha
 from .llm_service import LLMService
+from .conversion_cache import ConversionCache
+from .job_events import JobProgress
+from ..models.database import ConversionJob
 from ..models.schemas import FileConversion
 from ..config import settings
+from ..utils.chunking import CHARS_PER_TOKEN
 
 logger = structlog.get_logger()
 
 class ConversionService:
     """Service orchestrating the conversion process"""
     
-    def __init__(self, github_service: GitHubService, llm_service: LLMService):
+    def __init__(
+        self,
+        github_service: GitHubService,
+        llm_service: LLMService,
+        conversion_cache: Optional[ConversionCache] = None
+    ):
         self.github_service = github_service
         self.llm_service = llm_service
+        self.conversion_cache = conversion_cache
     
     async def process_repository(
         self,
@@ -28,9 +42,16 @@ class ConversionService:
         target_branch: str = None,
         source_languages: List[str] = None,
         target_language: str = "python",
-        task_id: str = None
+        task_id: str = None,
+        max_concurrency: Optional[int] = None,
+        progress: Optional[JobProgress] = None,
+        baseline_job: Optional[ConversionJob] = None
     ) -> None:
-        """Process entire repository for code conversion"""
+        """Process entire repository for code conversion
+        
+        With a baseline_job (an earlier completed job for the same repository), only files
+        whose blob changed since that job are converted; unchanged files reuse its output.
+        """
         
         if not target_branch:
             timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -45,87 +66,120 @@ class ConversionService:
                 target_branch=target_branch,
                 source_languages=source_languages,
                 target_language=target_language,
+                incremental=baseline_job is not None,
                 task_id=task_id
             )
             
+            if progress:
+                await progress.stage("discovering")
+            
             # Get repository
             repo = await self.github_service.get_repository(repo_owner, repo_name)
             
+            # Pin the head commit so discovery and the recorded snapshot agree
+            source_commit_sha = await self.github_service.get_branch_head(repo, source_branch)
+            
             # Find convertible files
             convertible_files = await self.github_service.find_convertible_files(
-                repo, source_branch, source_languages
+                repo, source_commit_sha, source_languages
             )
             
             if not convertible_files:
                 logger.info("No convertible files found in repository")
+                if progress:
+                    await progress.stage("no_convertible_files", files_total=0)
                 return
             
+            # Split files into those to convert and those unchanged since the baseline job
+            baseline_files = json.loads(baseline_job.source_files or "{}") if baseline_job else {}
+            unchanged = {}
+            for file_content, source_language in convertible_files:
+                previous = baseline_files.get(file_content.path)
+                if (previous
+                        and previous.get("sha") == file_content.sha
+                        and previous.get("language") == source_language
+                        and previous.get("converted_path") == self._get_target_path(file_content.path, target_language)):
+                    unchanged[file_content.path] = previous
+            current_paths = {file_content.path for file_content, _ in convertible_files}
+            removed = sorted(path for path in baseline_files if path not in current_paths)
+            
+            if baseline_job:
+                logger.info("Incremental reconversion",
+                          baseline_job_id=str(baseline_job.id),
+                          baseline_commit=baseline_job.source_commit_sha,
+                          source_commit=source_commit_sha,
+                          changed=len(convertible_files) - len(unchanged),
+                          unchanged=len(unchanged),
+                          removed=len(removed),
+                          task_id=task_id)
+                
+                # Nothing to reconvert: the baseline job's pull request is still current
+                if len(unchanged) == len(convertible_files) and not removed:
+                    logger.info("Repository unchanged since baseline job", baseline_job_id=str(baseline_job.id))
+                    if progress:
+                        await progress.stage("up_to_date", files_total=len(convertible_files))
+                        if baseline_job.pr_url:
+                            await progress.pull_request(baseline_job.pr_url)
+                        await progress.source_snapshot(source_commit_sha, baseline_files)
+                    return
+            
             # Create target branch
-            await self.github_service.create_branch(repo, source_branch, target_branch)
+            # Branch from the commit the files were discovered at, even if the source branch has moved since
+            await self.github_service.create_branch(repo, source_branch, target_branch, source_commit_sha)
             
-            # Process each convertible file
-            conversions = []
-            files_to_commit = []
-            files_to_remove = []
+            # Convert files concurrently, bounded per job
+            concurrency = max(1, max_concurrency or settings.conversion_concurrency)
+            semaphore = asyncio.Semaphore(concurrency)
             
-            for file_content, source_language in convertible_files:
-                try:
-                    logger.info("Processing file", 
-                              path=file_content.path, 
-                              language=source_language)
-                    
-                    # Get file content
-                    source_content = await self.github_service.get_file_content(file_content)
-                    
-                    # Convert to target language
-                    converted_code, conversion_notes = await self.llm_service.convert_code_to_python(
-                        source_content,
-                        file_content.path,
-                        source_language,
-                        target_language
-                    )
-                    
-                    # Determine target file path
-                    target_path = self._get_target_path(file_content.path, target_language)
-                    
-                    # Add proper formatting
-                    formatted_code = self._format_target_code(
-                        converted_code, 
-                        file_content.path, 
-                        source_language,
-                        target_language
-                    )
-                    
-                    # Track conversion
-                    conversion = FileConversion(
-                        original_path=file_content.path,
-                        converted_path=target_path,
-                        original_content=source_content,
-                        converted_content=formatted_code,
-                        source_language=source_language,
-                        target_language=target_language,
-                        conversion_notes=conversion_notes
-                    )
-                    
-                    conversions.append(conversion)
-                    files_to_commit.append((target_path, formatted_code))
-                    files_to_remove.append(file_content.path)  # Mark original file for removal
-                    
-                    logger.info("File converted successfully", 
-                              original=file_content.path, 
-                              converted=target_path,
-                              source_language=source_language,
-                              target_language=target_language)
-                    
-                except Exception as e:
-                    logger.error("Failed to process file", 
-                                path=file_content.path, 
-                                language=source_language,
-                                error=str(e))
-                    continue
+            logger.info("Converting files", 
+                      count=len(convertible_files), 
+                      concurrency=concurrency,
+                      task_id=task_id)
+            
+            if progress:
+                await progress.stage(
+                    "converting",
+                    files_total=len(convertible_files),
+                    **({"unchanged": len(unchanged), "removed": len(removed)} if baseline_job else {})
+                )
+            
+            # Unchanged files are carried forward; the rest are grouped into LLM requests
+            to_convert = [item for item in convertible_files if item[0].path not in unchanged]
+            packs = self._plan_packs(to_convert, target_language)
+            if len(packs) < len(to_convert):
+                logger.info("Packed small files into shared requests",
+                          files=len(to_convert),
+                          requests=len(packs),
+                          task_id=task_id)
+            
+            reused, converted = await asyncio.gather(
+                asyncio.gather(*[
+                    self._reuse_conversion(semaphore, repo, file_content, source_language, target_language,
+                                           unchanged[file_content.path], progress)
+                    for file_content, source_language in convertible_files if file_content.path in unchanged
+                ]),
+                asyncio.gather(*[
+                    self._convert_pack(semaphore, pack, target_language, progress) for pack in packs
+                ])
+            )
+            by_path = {conversion.original_path: conversion for conversion in reused if conversion is not None}
+            by_path.update({
+                file_content.path: conversion
+                for pack, pack_results in zip(packs, converted)
+                for (file_content, _), conversion in zip(pack, pack_results)
+            })
+            results = [by_path.get(file_content.path) for file_content, _ in convertible_files]
+            
+            # Collect successful conversions in discovery order
+            conversions = [conversion for conversion in results if conversion is not None]
+            source_files = self._source_snapshot(convertible_files, results)
+            files_to_commit = [(conv.converted_path, conv.converted_content) for conv in conversions]
+            files_to_remove = [conv.original_path for conv in conversions]  # Mark original files for removal
             
             if not files_to_commit:
                 logger.warning("No files were successfully converted")
+                if progress:
+                    await progress.stage("no_files_converted")
                 return
             
             # Commit all converted files
@@ -138,6 +192,9 @@ class ConversionService:
             
             commit_message = f"Convert multiple languages to {target_language}\n\nConverted {len(files_to_commit)} files ({lang_summary_text}) to {target_language} equivalents.\n\nFiles converted:\n" + "\n".join([f"- {conv.original_path} ({conv.source_language}) → {conv.converted_path}" for conv in conversions])
             
+            if progress:
+                await progress.stage("committing")
+            
             await self.github_service.commit_files(
                 repo,
                 target_branch,
@@ -146,6 +203,9 @@ class ConversionService:
                 files_to_remove
             )
             
+            if progress:
+                await progress.stage("creating_pull_request")
+            
             # Generate PR description
             pr_body = await self.llm_service.generate_pr_description(
                 [conv.dict() for conv in conversions],
@@ -162,11 +222,16 @@ class ConversionService:
                 source_branch
             )
             
+            if progress:
+                await progress.pull_request(pr_url)
+                await progress.source_snapshot(source_commit_sha, source_files)
+            
             logger.info(
                 "Repository processing completed",
                 conversions_count=len(conversions),
                 languages_converted=list(languages_summary.keys()),
                 pr_url=pr_url,
+                cache_stats=self.conversion_cache.stats() if self.conversion_cache else None,
                 task_id=task_id
             )
             
@@ -178,6 +243,318 @@ class ConversionService:
                         task_id=task_id)
             raise
     
+    async def _reuse_conversion(
+        self,
+        semaphore: asyncio.Semaphore,
+        repo: Repository,
+        file_content: Union[ContentFile, RepoFile],
+        source_language: str,
+        target_language: str,
+        previous: Dict[str, str],
+        progress: Optional[JobProgress] = None
+    ) -> Optional[FileConversion]:
+        """Carry forward a file unchanged since the baseline job, converting it again if its output is gone"""
+        async with semaphore:
+            try:
+                converted_content = await self.github_service.get_blob_content(repo, previous["converted_sha"])
+            except Exception as e:
+                logger.warning("Previous conversion unavailable, reconverting",
+                             path=file_content.path,
+                             error=str(e))
+                converted_content = None
+            
+            if converted_content is not None:
+                if progress:
+                    await progress.file_processed(
+                        file_content.path,
+                        "unchanged",
+                        converted_path=previous["converted_path"]
+                    )
+                
+                return FileConversion(
+                    original_path=file_content.path,
+                    converted_path=previous["converted_path"],
+                    original_content="",  # Source is unchanged and not downloaded again
+                    converted_content=converted_content,
+                    source_language=source_language,
+                    target_language=target_language
+                )
+        
+        return await self._convert_file(semaphore, file_content, source_language, target_language, progress)
+    
+    def _source_snapshot(
+        self,
+        convertible_files: List[Tuple[Union[ContentFile, RepoFile], str]],
+        results: List[Optional[FileConversion]]
+    ) -> Dict[str, Dict[str, str]]:
+        """Per-file blob SHAs of the converted files, as the baseline for the next incremental run"""
+        source_files = {}
+        for (file_content, source_language), conversion in zip(convertible_files, results):
+            # Failed files are left out so the next incremental run retries them
+            if conversion is None or not file_content.sha:
+                continue
+            source_files[file_content.path] = {
+                "sha": file_content.sha,
+                "language": source_language,
+                "converted_path": conversion.converted_path,
+                "converted_sha": git_blob_sha(conversion.converted_content.encode("utf-8")),
+            }
+        return source_files
+    
+    def _plan_packs(
+        self,
+        files: List[Tuple[Union[ContentFile, RepoFile], str]],
+        target_language: str
+    ) -> List[List[Tuple[Union[ContentFile, RepoFile], str]]]:
+        """Group files into LLM requests: small files of one language share a request, others go alone"""
+        if not settings.llm_packing_enabled or settings.llm_packing_max_files < 2:
+            return [[item] for item in files]
+        
+        requests = []
+        packs: Dict[str, List[Tuple[Union[ContentFile, RepoFile], str]]] = {}
+        pack_tokens: Dict[str, int] = {}
+        max_pack_tokens: Dict[str, int] = {}
+        for file_content, source_language in files:
+            if source_language not in max_pack_tokens:
+                # Leave room for the converted output in the model's context window
+                max_pack_tokens[source_language] = min(
+                    settings.llm_packing_max_tokens,
+                    self.llm_service.max_packed_source_tokens(source_language, target_language)
+                )
+            # Sizes come from discovery, so packing is decided before anything is downloaded
+            tokens = file_content.size // CHARS_PER_TOKEN + 1 if file_content.size is not None else None
+            if tokens is None or tokens > min(settings.llm_packing_max_file_tokens, max_pack_tokens[source_language]):
+                requests.append([(file_content, source_language)])
+                continue
+            
+            pack = packs.get(source_language)
+            if pack and (len(pack) >= settings.llm_packing_max_files
+                         or pack_tokens[source_language] + tokens > max_pack_tokens[source_language]):
+                requests.append(pack)
+                pack = None
+            if not pack:
+                pack = packs[source_language] = []
+                pack_tokens[source_language] = 0
+            pack.append((file_content, source_language))
+            pack_tokens[source_language] += tokens
+        
+        requests.extend(packs.values())
+        return requests
+    
+    async def _convert_pack(
+        self,
+        semaphore: asyncio.Semaphore,
+        pack: List[Tuple[Union[ContentFile, RepoFile], str]],
+        target_language: str,
+        progress: Optional[JobProgress] = None
+    ) -> List[Optional[FileConversion]]:
+        """Convert small files of one language in a single LLM request, falling back to one request per file"""
+        if len(pack) == 1:
+            file_content, source_language = pack[0]
+            return [await self._convert_file(semaphore, file_content, source_language, target_language, progress)]
+        
+        source_language = pack[0][1]
+        results: Dict[str, FileConversion] = {}
+        try:
+            pending = []
+            for file_content, _ in pack:
+                cache_key, cached = await self._lookup_cache(file_content, source_language, target_language)
+                if cached:
+                    source_content, converted_code, conversion_notes = cached
+                    results[file_content.path] = await self._file_converted(
+                        file_content, source_language, target_language,
+                        source_content, converted_code, conversion_notes, "cached", progress
+                    )
+                else:
+                    pending.append((file_content, cache_key))
+            
+            if pending:
+                async with semaphore:
+                    logger.info("Converting packed files",
+                              files=[file_content.path for file_content, _ in pending],
+                              language=source_language)
+                    sources = await asyncio.gather(*[
+                        self.github_service.get_file_content(file_content) for file_content, _ in pending
+                    ])
+                    converted = await self.llm_service.convert_files_packed(
+                        [(file_content.path, source) for (file_content, _), source in zip(pending, sources)],
+                        source_language,
+                        target_language
+                    )
+                
+                for (file_content, cache_key), source_content in zip(pending, sources):
+                    if file_content.path not in converted:
+                        continue
+                    converted_code, conversion_notes = converted[file_content.path]
+                    await self._store_cache(
+                        cache_key, file_content, source_language, target_language,
+                        source_content, converted_code, conversion_notes
+                    )
+                    results[file_content.path] = await self._file_converted(
+                        file_content, source_language, target_language,
+                        source_content, converted_code, conversion_notes, "converted", progress
+                    )
+        except Exception as e:
+            logger.warning("Packed conversion failed, converting files individually",
+                         files=len(pack),
+                         language=source_language,
+                         error=str(e))
+        
+        # Files the packed response did not cover get their own request
+        missing = [file_content for file_content, _ in pack if file_content.path not in results]
+        if missing:
+            fallback = await asyncio.gather(*[
+                self._convert_file(semaphore, file_content, source_language, target_language, progress)
+                for file_content in missing
+            ])
+            results.update({
+                file_content.path: conversion
+                for file_content, conversion in zip(missing, fallback) if conversion is not None
+            })
+        
+        return [results.get(file_content.path) for file_content, _ in pack]
+    
+    async def _convert_file(
+        self,
+        semaphore: asyncio.Semaphore,
+        file_content: Union[ContentFile, RepoFile],
+        source_language: str,
+        target_language: str,
+        progress: Optional[JobProgress] = None
+    ) -> Optional[FileConversion]:
+        """Download and convert a single file, returning None on failure"""
+        async with semaphore:
+            try:
+                logger.info("Processing file", 
+                          path=file_content.path, 
+                          language=source_language)
+                
+                # Serve unchanged files from the cache, skipping download and LLM call
+                cache_key, cached = await self._lookup_cache(file_content, source_language, target_language)
+                
+                if cached:
+                    source_content, converted_code, conversion_notes = cached
+                else:
+                    # Get file content
+                    source_content = await self.github_service.get_file_content(file_content)
+                    
+                    # Convert to target language
+                    converted_code, conversion_notes = await self.llm_service.convert_code_to_python(
+                        source_content,
+                        file_content.path,
+                        source_language,
+                        target_language
+                    )
+                    
+                    await self._store_cache(
+                        cache_key, file_content, source_language, target_language,
+                        source_content, converted_code, conversion_notes
+                    )
+                
+                return await self._file_converted(
+                    file_content, source_language, target_language,
+                    source_content, converted_code, conversion_notes,
+                    "cached" if cached else "converted", progress
+                )
+                
+            except Exception as e:
+                logger.error("Failed to process file", 
+                            path=file_content.path, 
+                            language=source_language,
+                            error=str(e))
+                if progress:
+                    await progress.file_processed(file_content.path, "failed")
+                return None
+    
+    async def _lookup_cache(
+        self,
+        file_content: Union[ContentFile, RepoFile],
+        source_language: str,
+        target_language: str
+    ) -> Tuple[Optional[str], Optional[Tuple[str, str, Optional[str]]]]:
+        """Get the cache key for a file and its cached conversion, if any"""
+        if not self.conversion_cache or not file_content.sha:
+            return None, None
+        
+        cache_key = self.conversion_cache.make_key(
+            file_content.sha,
+            source_language,
+            target_language,
+            self.llm_service.model,
+            self.llm_service.prompt_version(source_language, target_language)
+        )
+        cached = await self.conversion_cache.get(cache_key)
+        if cached:
+            logger.info("Conversion cache hit", path=file_content.path, blob_sha=file_content.sha)
+        return cache_key, cached
+    
+    async def _store_cache(
+        self,
+        cache_key: Optional[str],
+        file_content: Union[ContentFile, RepoFile],
+        source_language: str,
+        target_language: str,
+        source_content: str,
+        converted_code: str,
+        conversion_notes: Optional[str]
+    ) -> None:
+        """Cache a fresh conversion"""
+        if not cache_key:
+            return
+        await self.conversion_cache.put(
+            cache_key,
+            file_content.sha,
+            source_language,
+            target_language,
+            self.llm_service.model,
+            self.llm_service.prompt_version(source_language, target_language),
+            source_content,
+            converted_code,
+            conversion_notes
+        )
+    
+    async def _file_converted(
+        self,
+        file_content: Union[ContentFile, RepoFile],
+        source_language: str,
+        target_language: str,
+        source_content: str,
+        converted_code: str,
+        conversion_notes: Optional[str],
+        outcome: str,
+        progress: Optional[JobProgress] = None
+    ) -> FileConversion:
+        """Format a converted file, report it and build its FileConversion"""
+        # Determine target file path
+        target_path = self._get_target_path(file_content.path, target_language)
+        
+        # Add proper formatting
+        formatted_code = self._format_target_code(
+            converted_code, 
+            file_content.path, 
+            source_language,
+            target_language
+        )
+        
+        logger.info("File converted successfully", 
+                  original=file_content.path, 
+                  converted=target_path,
+                  source_language=source_language,
+                  target_language=target_language)
+        
+        if progress:
+            await progress.file_processed(file_content.path, outcome, converted_path=target_path)
+        
+        return FileConversion(
+            original_path=file_content.path,
+            converted_path=target_path,
+            original_content=source_content,
+            converted_content=formatted_code,
+            source_language=source_language,
+            target_language=target_language,
+            conversion_notes=conversion_notes
+        )
+    
     def _get_target_path(self, original_path: str, target_language: str) -> str:
         """Convert original file path to target language file path"""
         # Get file extension for target language
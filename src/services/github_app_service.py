@@ -1,19 +1,31 @@
 """
 GitHub App Service for secure authentication and token management
 """
+import asyncio
 import jwt
+import threading
 import time
 import httpx
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import Awaitable, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
 import structlog
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
 from sqlalchemy.orm import Session
 
 from ..config import settings
 from ..models.database import User
+from .github_transport import get_rate_limit_budget, installation_budget_key
 
 logger = structlog.get_logger()
 
+# GitHub rejects app JWTs valid for more than 10 minutes
+JWT_LIFETIME_SECONDS = 10 * 60
+# Renew the cached app JWT this long before it expires
+JWT_RENEWAL_MARGIN_SECONDS = 60
+# App-level (JWT) calls share one rate limit budget, separate from installations
+APP_BUDGET_KEY = "app"
+
 class GitHubAppService:
     """Service for GitHub App authentication and token management"""
     
@@ -24,18 +36,91 @@ class GitHubAppService:
         self.client_secret = settings.github_client_secret
         self.webhook_secret = settings.github_webhook_secret
         
-        # Load private key
+        # Load and parse private key once
         self.private_key = self._load_private_key()
+        
+        # Cached app JWT: (token, expires_at unix time)
+        self._jwt: Optional[Tuple[str, int]] = None
+        self._jwt_lock = threading.Lock()
+        
+        # Pooled HTTP client shared by all GitHub API calls (created on first use)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        
+        # Installation access tokens by installation ID: (token, expires_at)
+        self._installation_tokens: Dict[str, Tuple[str, datetime]] = {}
+        self._token_refreshes: Dict[str, asyncio.Future] = {}
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for GitHub API calls"""
+        if self._http_client is None or self._http_client.is_closed:
+            http2 = settings.github_http2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+                    http2 = False
+            
+            self._http_client = httpx.AsyncClient(
+                http2=http2,
+                timeout=httpx.Timeout(
+                    settings.github_http_timeout,
+                    connect=settings.github_http_connect_timeout
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.github_http_max_connections,
+                    max_keepalive_connections=settings.github_http_max_keepalive_connections,
+                    keepalive_expiry=settings.github_http_keepalive_expiry
+                )
+            )
+            logger.info("Created pooled GitHub App HTTP client",
+                       http2=http2,
+                       max_connections=settings.github_http_max_connections)
+        return self._http_client
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP client (call on shutdown)"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
     
-    def _load_private_key(self) -> Optional[str]:
-        """Load GitHub App private key from file"""
+    async def _paced_request(self, budget_key: str, request: Awaitable[httpx.Response]) -> httpx.Response:
+        """Send a request once the rate limit budget allows and record the budget it reports"""
+        budget = get_rate_limit_budget(budget_key)
+        delay = budget.reserve()
+        if delay > 0:
+            if delay > settings.github_rate_limit_max_wait:
+                request.close()
+                raise Exception(f"GitHub rate limit budget exhausted for {round(delay)}s")
+            await asyncio.sleep(delay)
+        response = await request
+        budget.record(response.headers)
+        return response
+    
+    async def health_check(self) -> bool:
+        """Check GitHub API reachability (the rate limit endpoint does not count against the limit)"""
+        try:
+            response = await self._get_http_client().get(
+                f'{settings.github_api_url}/rate_limit',
+                headers={
+                    'Accept': 'application/vnd.github.v3+json',
+                    'User-Agent': 'CodeConversionMCPServer/1.0'
+                }
+            )
+            return response.status_code == 200
+        except Exception as e:
+            logger.error("GitHub health check failed", error=str(e))
+            return False
+    
+    def _load_private_key(self) -> Optional[RSAPrivateKey]:
+        """Load and parse GitHub App private key from file"""
         if not self.private_key_path:
             logger.warning("No GitHub App private key path configured")
             return None
             
         try:
-            with open(self.private_key_path, 'r') as f:
-                return f.read()
+            with open(self.private_key_path, 'rb') as f:
+                return serialization.load_pem_private_key(f.read(), password=None)
         except FileNotFoundError:
             logger.error("GitHub App private key file not found", path=self.private_key_path)
             return None
@@ -44,44 +129,50 @@ class GitHubAppService:
             return None
     
     def generate_jwt_token(self) -> str:
-        """Generate JWT token for GitHub App authentication"""
+        """Get JWT token for GitHub App authentication, re-signing shortly before expiry"""
         if not self.private_key or not self.app_id:
             raise ValueError("GitHub App credentials not configured")
         
-        # Token expires in 10 minutes (GitHub's maximum)
-        now = int(time.time())
-        payload = {
-            'iat': now - 60,  # Issued 1 minute ago (for clock skew)
-            'exp': now + (10 * 60),  # Expires in 10 minutes
-            'iss': self.app_id  # GitHub App ID
-        }
-        
-        token = jwt.encode(payload, self.private_key, algorithm='RS256')
-        return token
+        with self._jwt_lock:
+            now = int(time.time())
+            if self._jwt and self._jwt[1] - now > JWT_RENEWAL_MARGIN_SECONDS:
+                return self._jwt[0]
+            
+            # Token expires in 10 minutes (GitHub's maximum)
+            expires_at = now + JWT_LIFETIME_SECONDS
+            payload = {
+                'iat': now - 60,  # Issued 1 minute ago (for clock skew)
+                'exp': expires_at,  # Expires in 10 minutes
+                'iss': self.app_id  # GitHub App ID
+            }
+            
+            token = jwt.encode(payload, self.private_key, algorithm='RS256')
+            self._jwt = (token, expires_at)
+            return token
     
     async def get_app_installations(self) -> list:
         """Get all installations of the GitHub App"""
         jwt_token = self.generate_jwt_token()
         
-        async with httpx.AsyncClient() as client:
-            headers = {
-                'Authorization': f'Bearer {jwt_token}',
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': 'CodeConversionMCPServer/1.0'
-            }
-            
-            response = await client.get(
-                f'{settings.github_api_url}/app/installations',
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error("Failed to get app installations", 
-                           status_code=response.status_code,
-                           response=response.text)
-                raise Exception(f"Failed to get installations: {response.status_code}")
+        client = self._get_http_client()
+        headers = {
+            'Authorization': f'Bearer {jwt_token}',
+            'Accept': 'application/vnd.github.v3+json',
+            'User-Agent': 'CodeConversionMCPServer/1.0'
+        }
+        
+        response = await self._paced_request(
+            APP_BUDGET_KEY,
+            client.get(f'{settings.github_api_url}/app/installations', headers=headers)
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            logger.error("Failed to get app installations", 
+                       status_code=response.status_code,
+                       response=response.text)
+            raise Exception(f"Failed to get installations: {response.status_code}")
     
     async def get_installation_by_user(self, username: str) -> Optional[Dict[str, Any]]:
         """Get installation for a specific GitHub user"""
@@ -94,21 +185,57 @@ class GitHubAppService:
         return None
     
     async def get_installation_token(self, installation_id: str) -> str:
-        """Alias for generate_installation_access_token for backward compatibility"""
-        return await self.generate_installation_access_token(installation_id)
+        """Get a cached installation access token, refreshing it shortly before expiry"""
+        key = str(installation_id)
+        now = datetime.now(timezone.utc)
+        refresh_margin = timedelta(seconds=settings.github_token_refresh_margin)
+        
+        cached = self._installation_tokens.get(key)
+        if cached and cached[1] - now > refresh_margin:
+            return cached[0]
+        
+        # Coalesce concurrent refreshes for the same installation into one request
+        refresh = self._token_refreshes.get(key)
+        if refresh is None:
+            refresh = asyncio.ensure_future(self._request_installation_token(key))
+            self._token_refreshes[key] = refresh
+            refresh.add_done_callback(lambda _: self._token_refreshes.pop(key, None))
+        
+        try:
+            token, expires_at = await asyncio.shield(refresh)
+        except Exception as e:
+            # Keep serving a token that is inside the refresh margin but not yet expired
+            if cached and cached[1] > datetime.now(timezone.utc):
+                logger.warning("Installation token refresh failed, using current token",
+                             installation_id=key,
+                             expires_at=cached[1].isoformat(),
+                             error=str(e))
+                return cached[0]
+            raise
+        
+        self._installation_tokens[key] = (token, expires_at)
+        return token
 
     async def generate_installation_access_token(self, installation_id: str) -> str:
         """Generate installation access token for repository access"""
+        token, expires_at = await self._request_installation_token(str(installation_id))
+        self._installation_tokens[str(installation_id)] = (token, expires_at)
+        return token
+    
+    async def _request_installation_token(self, installation_id: str) -> Tuple[str, datetime]:
+        """Request a new installation access token from GitHub"""
         jwt_token = self.generate_jwt_token()
         
-        async with httpx.AsyncClient() as client:
-            headers = {
-                'Authorization': f'Bearer {jwt_token}',
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': 'CodeConversionMCPServer/1.0'
-            }
-            
-            response = await client.post(
+        client = self._get_http_client()
+        headers = {
+            'Authorization': f'Bearer {jwt_token}',
+            'Accept': 'application/vnd.github.v3+json',
+            'User-Agent': 'CodeConversionMCPServer/1.0'
+        }
+        
+        response = await self._paced_request(
+            APP_BUDGET_KEY,
+            client.post(
                 f'{settings.github_api_url}/app/installations/{installation_id}/access_tokens',
                 headers=headers,
                 json={
@@ -119,43 +246,50 @@ class GitHubAppService:
                     }
                 }
             )
-            
-            if response.status_code == 201:
-                data = response.json()
-                logger.info("Generated installation access token", 
-                          installation_id=installation_id,
-                          expires_at=data.get('expires_at'))
-                return data['token']
+        )
+        
+        if response.status_code == 201:
+            data = response.json()
+            logger.info("Generated installation access token", 
+                      installation_id=installation_id,
+                      expires_at=data.get('expires_at'))
+            expires_at = data.get('expires_at')
+            if expires_at:
+                expires_at = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
             else:
-                logger.error("Failed to generate installation access token",
-                           installation_id=installation_id,
-                           status_code=response.status_code,
-                           response=response.text)
-                raise Exception(f"Failed to generate access token: {response.status_code}")
+                # Installation tokens are valid for one hour
+                expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+            return data['token'], expires_at
+        else:
+            logger.error("Failed to generate installation access token",
+                       installation_id=installation_id,
+                       status_code=response.status_code,
+                       response=response.text)
+            raise Exception(f"Failed to generate access token: {response.status_code}")
     
     async def get_installation_repositories(self, installation_id: str) -> list:
         """Get repositories accessible through an installation"""
-        access_token = await self.generate_installation_access_token(installation_id)
+        access_token = await self.get_installation_token(installation_id)
         
-        async with httpx.AsyncClient() as client:
-            headers = {
-                'Authorization': f'token {access_token}',
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': 'CodeConversionMCPServer/1.0'
-            }
-            
-            response = await client.get(
-                f'{settings.github_api_url}/installation/repositories',
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                return response.json().get('repositories', [])
-            else:
-                logger.error("Failed to get installation repositories",
-                           installation_id=installation_id,
-                           status_code=response.status_code)
-                raise Exception(f"Failed to get repositories: {response.status_code}")
+        client = self._get_http_client()
+        headers = {
+            'Authorization': f'token {access_token}',
+            'Accept': 'application/vnd.github.v3+json',
+            'User-Agent': 'CodeConversionMCPServer/1.0'
+        }
+        
+        response = await self._paced_request(
+            installation_budget_key(installation_id),
+            client.get(f'{settings.github_api_url}/installation/repositories', headers=headers)
+        )
+        
+        if response.status_code == 200:
+            return response.json().get('repositories', [])
+        else:
+            logger.error("Failed to get installation repositories",
+                       installation_id=installation_id,
+                       status_code=response.status_code)
+            raise Exception(f"Failed to get repositories: {response.status_code}")
     
     async def validate_repository_access(self, username: str, repo_owner: str, repo_name: str) -> bool:
         """Validate that user has granted access to specific repository through GitHub App"""
@@ -196,7 +330,7 @@ class GitHubAppService:
         if not installation:
             raise ValueError(f"No GitHub App installation found for user {user.github_username}")
         
-        access_token = await self.generate_installation_access_token(installation['id'])
+        access_token = await self.get_installation_token(installation['id'])
         return access_token
     
     def generate_oauth_url(self, state: str) -> str:
@@ -218,40 +352,40 @@ class GitHubAppService:
     
     async def exchange_code_for_token(self, code: str) -> Dict[str, Any]:
         """Exchange OAuth code for access token"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                'https://github.com/login/oauth/access_token',
-                headers={
-                    'Accept': 'application/json',
-                    'User-Agent': 'CodeConversionMCPServer/1.0'
-                },
-                data={
-                    'client_id': self.client_id,
-                    'client_secret': self.client_secret,
-                    'code': code
-                }
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise Exception(f"Failed to exchange code: {response.status_code}")
+        client = self._get_http_client()
+        response = await client.post(
+            'https://github.com/login/oauth/access_token',
+            headers={
+                'Accept': 'application/json',
+                'User-Agent': 'CodeConversionMCPServer/1.0'
+            },
+            data={
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'code': code
+            }
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise Exception(f"Failed to exchange code: {response.status_code}")
     
     async def get_user_info(self, access_token: str) -> Dict[str, Any]:
         """Get user information using access token"""
-        async with httpx.AsyncClient() as client:
-            headers = {
-                'Authorization': f'token {access_token}',
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': 'CodeConversionMCPServer/1.0'
-            }
-            
-            response = await client.get(
-                f'{settings.github_api_url}/user',
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise Exception(f"Failed to get user info: {response.status_code}")
+        client = self._get_http_client()
+        headers = {
+            'Authorization': f'token {access_token}',
+            'Accept': 'application/vnd.github.v3+json',
+            'User-Agent': 'CodeConversionMCPServer/1.0'
+        }
+        
+        response = await client.get(
+            f'{settings.github_api_url}/user',
+            headers=headers
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise Exception(f"Failed to get user info: {response.status_code}")
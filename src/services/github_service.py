@@ -2,21 +2,100 @@
 GitHub service for repository operations
 """
 import asyncio
-from typing import List, Tuple, Optional
+import base64
+import hashlib
+import io
+import posixpath
+import tarfile
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Tuple, Optional, Union
+import httpx
 import structlog
 from github import Github, GithubException, InputGitTreeElement
 from github.Repository import Repository
 from github.ContentFile import ContentFile
 from ..config import settings
+from .github_transport import (
+    RateLimitDeferred,
+    get_rate_limit_budget,
+    install_github_transport,
+    token_budget_key,
+    wait_for_budget,
+)
 
 logger = structlog.get_logger()
 
+class RepoFile:
+    """Repository file discovered from a git tree, fetched lazily by blob SHA"""
+    
+    def __init__(
+        self,
+        repo: Repository,
+        path: str,
+        sha: str,
+        size: Optional[int] = None,
+        content: Optional[bytes] = None
+    ):
+        self.repo = repo
+        self.path = path
+        self.name = posixpath.basename(path)
+        self.sha = sha
+        self.size = size
+        self.type = "file"
+        self._content = content
+    
+    @property
+    def decoded_content(self) -> bytes:
+        """Raw file bytes, fetched through the Git Blobs API on first access"""
+        if self._content is None:
+            blob = self.repo.get_git_blob(self.sha)
+            self._content = base64.b64decode(blob.content)
+        return self._content
+
+class _ChunkStream(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks"""
+    
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, target) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = chunk
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+def git_blob_sha(content: bytes) -> str:
+    """Compute the git blob SHA of file content"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
 class GitHubService:
     """Service for GitHub operations"""
     
-    def __init__(self, token: str):
-        self.github = Github(token)
+    def __init__(self, token: str, budget_key: Optional[str] = None):
+        self.github = Github(token, base_url=settings.github_api_url)
         self.token = token
+        # Calls made with installation tokens share the installation's rate limit
+        self.budget_key = budget_key or token_budget_key(token)
+        install_github_transport(self.github, self.budget_key)
+    
+    async def _call(self, function, *args, **kwargs):
+        """Run a blocking PyGithub call in a worker thread, waiting out long rate limit deferrals on the event loop"""
+        while True:
+            try:
+                return await asyncio.to_thread(function, *args, **kwargs)
+            except RateLimitDeferred as e:
+                logger.info("Waiting for GitHub rate limit budget", budget=self.budget_key, delay=round(e.delay, 1))
+                await asyncio.sleep(e.delay)
     
     async def health_check(self) -> bool:
         """Check GitHub service health"""
@@ -32,7 +111,7 @@ class GitHubService:
     async def get_repository(self, owner: str, name: str) -> Repository:
         """Get repository object"""
         try:
-            repo = self.github.get_repo(f"{owner}/{name}")
+            repo = await self._call(self.github.get_repo, f"{owner}/{name}")
             return repo
         except GithubException as e:
             logger.error("Failed to get repository", owner=owner, name=name, error=str(e))
@@ -43,10 +122,8 @@ class GitHubService:
         repo: Repository, 
         branch: str = "main",
         source_languages: Optional[List[str]] = None
-    ) -> List[Tuple[ContentFile, str]]:
+    ) -> List[Tuple[Union[ContentFile, RepoFile], str]]:
         """Find all convertible files in repository"""
-        convertible_files = []
-        
         # Determine which extensions to look for
         target_extensions = []
         if source_languages:
@@ -59,55 +136,195 @@ class GitHubService:
             target_extensions = list(settings.supported_extensions.keys())
         
         try:
-            # Get repository contents recursively
-            contents = repo.get_contents("", ref=branch)
+            # Discovery may be paced by the rate limit transport, so keep it off the event loop
+            if settings.github_discovery_mode == "contents":
+                discover = self._find_files_via_contents
+            elif settings.github_discovery_mode == "archive":
+                discover = self._find_files_via_archive
+            else:
+                discover = self._find_files_via_tree
+            convertible_files = await self._call(discover, repo, branch, target_extensions)
             
-            while contents:
-                file_content = contents.pop(0)
-                
-                if file_content.type == "dir":
-                    # Add directory contents to process
-                    contents.extend(repo.get_contents(file_content.path, ref=branch))
-                else:
-                    # Check if file has a supported extension
-                    for ext in target_extensions:
-                        if file_content.name.endswith(ext):
-                            language = settings.supported_extensions[ext]
-                            convertible_files.append((file_content, language))
-                            logger.info("Found convertible file", 
-                                      path=file_content.path, 
-                                      language=language)
-                            break
-            
-            logger.info("File discovery complete", count=len(convertible_files))
+            logger.info("File discovery complete", 
+                       count=len(convertible_files),
+                       mode=settings.github_discovery_mode)
             return convertible_files
             
         except GithubException as e:
             logger.error("Failed to find convertible files", error=str(e))
             raise
     
-    async def get_file_content(self, file: ContentFile) -> str:
+    def _match_language(self, name: str, target_extensions: List[str]) -> Optional[str]:
+        """Get the source language for a file name, if it has a supported extension"""
+        for ext in target_extensions:
+            if name.endswith(ext):
+                return settings.supported_extensions[ext]
+        return None
+    
+    def _find_files_via_tree(
+        self,
+        repo: Repository,
+        branch: str,
+        target_extensions: List[str]
+    ) -> List[Tuple[RepoFile, str]]:
+        """Discover files with the recursive Git Trees API and filter locally"""
+        convertible_files = []
+        
+        # One recursive listing per tree; split into subtrees only when GitHub truncates
+        pending = deque([(branch, "")])
+        while pending:
+            tree_sha, prefix = pending.popleft()
+            tree = repo.get_git_tree(tree_sha, recursive=True)
+            
+            if tree.raw_data.get("truncated"):
+                logger.warning("Recursive tree truncated, listing subtrees", path=prefix or "/")
+                tree = repo.get_git_tree(tree_sha)
+                for element in tree.tree:
+                    if element.type == "tree":
+                        pending.append((element.sha, f"{prefix}{element.path}/"))
+            
+            for element in tree.tree:
+                # Skip directories, submodules and symlinks
+                if element.type != "blob" or element.mode == "120000":
+                    continue
+                
+                path = f"{prefix}{element.path}"
+                language = self._match_language(posixpath.basename(path), target_extensions)
+                if language:
+                    convertible_files.append((RepoFile(repo, path, element.sha, element.size), language))
+                    logger.info("Found convertible file", path=path, language=language)
+        
+        return convertible_files
+    
+    def _find_files_via_archive(
+        self,
+        repo: Repository,
+        branch: str,
+        target_extensions: List[str]
+    ) -> List[Tuple[RepoFile, str]]:
+        """Stream the branch tarball once, keeping only convertible files in memory"""
+        convertible_files = []
+        url = f"{settings.github_api_url}/repos/{repo.full_name}/tarball/{branch}"
+        headers = {
+            'Authorization': f'token {self.token}',
+            'Accept': 'application/vnd.github.v3+json',
+            'User-Agent': 'CodeConversionMCPServer/1.0'
+        }
+        
+        budget = get_rate_limit_budget(self.budget_key)
+        delay = budget.reserve()
+        if delay > 0:
+            wait_for_budget(budget, delay)
+        
+        with httpx.stream(
+            "GET",
+            url,
+            headers=headers,
+            follow_redirects=True,
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        ) as response:
+            budget.record(response.headers)
+            response.raise_for_status()
+            
+            with tarfile.open(fileobj=_ChunkStream(response.iter_bytes()), mode="r|gz") as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+                    
+                    # Drop the "<owner>-<repo>-<sha>/" prefix GitHub adds
+                    path = member.name.split("/", 1)[-1]
+                    language = self._match_language(posixpath.basename(path), target_extensions)
+                    if not language:
+                        continue  # Unread member data is skipped by the stream
+                    
+                    content = archive.extractfile(member).read()
+                    convertible_files.append((
+                        RepoFile(repo, path, git_blob_sha(content), len(content), content),
+                        language
+                    ))
+                    logger.info("Found convertible file", path=path, language=language)
+        
+        return convertible_files
+    
+    def _find_files_via_contents(
+        self,
+        repo: Repository,
+        branch: str,
+        target_extensions: List[str]
+    ) -> List[Tuple[ContentFile, str]]:
+        """Discover files by listing each directory through the Contents API"""
+        convertible_files = []
+        
+        # Get repository contents recursively
+        contents = deque(repo.get_contents("", ref=branch))
+        
+        while contents:
+            file_content = contents.popleft()
+            
+            if file_content.type == "dir":
+                # Add directory contents to process
+                contents.extend(repo.get_contents(file_content.path, ref=branch))
+            else:
+                # Check if file has a supported extension
+                language = self._match_language(file_content.name, target_extensions)
+                if language:
+                    convertible_files.append((file_content, language))
+                    logger.info("Found convertible file", 
+                              path=file_content.path, 
+                              language=language)
+        
+        return convertible_files
+    
+    async def get_branch_head(self, repo: Repository, branch: str) -> str:
+        """Get the commit SHA a branch currently points to"""
+        try:
+            ref = await self._call(repo.get_git_ref, f"heads/{branch}")
+            return ref.object.sha
+        except GithubException as e:
+            logger.error("Failed to get branch head", branch=branch, error=str(e))
+            raise
+    
+    async def get_blob_content(self, repo: Repository, sha: str) -> str:
+        """Get decoded content of a blob by SHA"""
+        blob = await self._call(repo.get_git_blob, sha)
+        return base64.b64decode(blob.content).decode('utf-8')
+    
+    async def get_file_content(self, file: Union[ContentFile, RepoFile]) -> str:
         """Get decoded content of a file"""
         try:
-            content = file.decoded_content.decode('utf-8')
+            # decoded_content may trigger a lazy fetch, so keep it off the event loop
+            decoded = await self._call(lambda: file.decoded_content)
+            content = decoded.decode('utf-8')
             return content
         except Exception as e:
             logger.error("Failed to get file content", path=file.path, error=str(e))
             raise
     
-    async def create_branch(self, repo: Repository, source_branch: str, target_branch: str) -> None:
-        """Create a new branch from source branch"""
+    async def create_branch(
+        self,
+        repo: Repository,
+        source_branch: str,
+        target_branch: str,
+        source_sha: Optional[str] = None
+    ) -> None:
+        """Create a new branch from a source commit (the source branch head unless given)"""
         try:
-            # Get source branch reference
-            source_ref = repo.get_git_ref(f"heads/{source_branch}")
+            if source_sha is None:
+                # Get source branch reference
+                source_ref = await self._call(repo.get_git_ref, f"heads/{source_branch}")
+                source_sha = source_ref.object.sha
             
             # Create new branch
-            repo.create_git_ref(
+            await self._call(
+                repo.create_git_ref,
                 ref=f"refs/heads/{target_branch}",
-                sha=source_ref.object.sha
+                sha=source_sha
             )
             
-            logger.info("Created branch", target_branch=target_branch, source_branch=source_branch)
+            logger.info("Created branch",
+                       target_branch=target_branch,
+                       source_branch=source_branch,
+                       source_sha=source_sha)
             
         except GithubException as e:
             if "Reference already exists" in str(e):
@@ -123,26 +340,49 @@ class GitHubService:
         files: List[Tuple[str, str]],  # (path, content) pairs
         commit_message: str,
         files_to_remove: Optional[List[str]] = None  # paths to remove
-    ) -> None:
-        """Commit multiple files to repository and optionally remove files"""
+    ) -> Dict[str, float]:
+        """Commit multiple files to repository and optionally remove files, returning per-phase timings"""
+        timings = {}
         try:
-            # Get the current commit SHA
-            ref = repo.get_git_ref(f"heads/{branch}")
+            # Get the current commit; its tree is the base for the new tree
+            ref = await self._call(repo.get_git_ref, f"heads/{branch}")
             current_sha = ref.object.sha
+            parent_commit = await self._call(repo.get_git_commit, current_sha)
             
-            # Create blobs for each file to add
-            blobs = []
+            # Small files are embedded in the tree request; larger ones become blobs in parallel
+            phase_start = time.perf_counter()
+            inline_files = []
+            blob_files = []
             for file_path, content in files:
-                blob = repo.create_git_blob(content, "utf-8")
-                blobs.append((file_path, blob.sha))
+                if len(content.encode("utf-8")) <= settings.github_inline_blob_max_bytes:
+                    inline_files.append((file_path, content))
+                else:
+                    blob_files.append((file_path, content))
             
-            # Get current tree
-            base_tree = repo.get_git_tree(current_sha)
+            semaphore = asyncio.Semaphore(max(1, settings.github_blob_concurrency))
+            
+            async def create_blob(file_path: str, content: str) -> Tuple[str, str]:
+                async with semaphore:
+                    blob = await self._call(repo.create_git_blob, content, "utf-8")
+                    return file_path, blob.sha
+            
+            blobs = await asyncio.gather(*[
+                create_blob(file_path, content) for file_path, content in blob_files
+            ])
+            timings["blobs"] = time.perf_counter() - phase_start
             
             # Create tree elements - include new files and mark files for removal
             tree_elements = []
             
             # Add new converted files
+            for file_path, content in inline_files:
+                tree_elements.append(InputGitTreeElement(
+                    path=file_path,
+                    mode="100644",
+                    type="blob",
+                    content=content
+                ))
+            
             for file_path, blob_sha in blobs:
                 tree_elements.append(InputGitTreeElement(
                     path=file_path,
@@ -162,22 +402,33 @@ class GitHubService:
                     ))
             
             # Create new tree that includes existing files plus new converted files minus removed files
-            new_tree = repo.create_git_tree(tree_elements, base_tree)
+            phase_start = time.perf_counter()
+            new_tree = await self._call(repo.create_git_tree, tree_elements, parent_commit.tree)
+            timings["tree"] = time.perf_counter() - phase_start
             
             # Create commit
-            commit = repo.create_git_commit(
+            phase_start = time.perf_counter()
+            commit = await self._call(
+                repo.create_git_commit,
                 message=commit_message,
                 tree=new_tree,
-                parents=[repo.get_git_commit(current_sha)]
+                parents=[parent_commit]
             )
+            timings["commit"] = time.perf_counter() - phase_start
             
             # Update branch reference
-            ref.edit(commit.sha)
+            phase_start = time.perf_counter()
+            await self._call(ref.edit, commit.sha)
+            timings["ref_update"] = time.perf_counter() - phase_start
             
             logger.info("Files committed", 
                        branch=branch, 
                        files_added=len(files), 
-                       files_removed=len(files_to_remove) if files_to_remove else 0)
+                       files_inlined=len(inline_files),
+                       blobs_created=len(blobs),
+                       files_removed=len(files_to_remove) if files_to_remove else 0,
+                       timings={phase: round(seconds, 3) for phase, seconds in timings.items()})
+            return timings
             
         except GithubException as e:
             logger.error("Failed to commit files", error=str(e))
@@ -193,7 +444,8 @@ class GitHubService:
     ) -> str:
         """Create a pull request"""
         try:
-            pr = repo.create_pull(
+            pr = await self._call(
+                repo.create_pull,
                 title=title,
                 body=body,
                 head=head_branch,
@@ -0,0 +1,267 @@
+"""
+Rate-limit-aware transport for GitHub REST calls: per-installation budgets and conditional requests
+"""
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+import requests
+import structlog
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from ..config import settings
+from ..utils.ttl_cache import TTLCache
+
+logger = structlog.get_logger()
+
+# Reads whose responses carry ETags worth revalidating: repository metadata and refs. Trees are
+# fetched by immutable SHA and are the largest bodies, so revalidating them rarely pays for the memory
+CONDITIONAL_PATHS = re.compile(r"/repos/[^/]+/[^/]+(/git/refs?/.+)?$")
+
+class RateLimitDeferred(Exception):
+    """Raised in a worker thread when a GitHub call must wait too long to sleep there"""
+    
+    def __init__(self, budget_key: str, delay: float):
+        super().__init__(f"GitHub rate limit budget {budget_key} deferred for {round(delay, 1)}s")
+        self.budget_key = budget_key
+        self.delay = delay
+
+class RateLimitBudget:
+    """Remaining GitHub API budget for one installation (or token), from X-RateLimit-* headers"""
+    
+    def __init__(self, key: str):
+        self.key = key
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None  # Epoch seconds
+        self.requests = 0
+        self.not_modified = 0
+        self.rate_limited = 0
+        self.paced_seconds = 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, headers: Mapping[str, str]) -> None:
+        """Adopt the budget reported by a core API response"""
+        if headers.get("x-ratelimit-resource", "core") != "core":
+            return
+        try:
+            remaining = int(float(headers["x-ratelimit-remaining"]))
+        except (KeyError, ValueError):
+            return
+        
+        with self._lock:
+            self.remaining = remaining
+            if "x-ratelimit-limit" in headers:
+                self.limit = int(float(headers["x-ratelimit-limit"]))
+            if "x-ratelimit-reset" in headers:
+                self.reset_at = float(headers["x-ratelimit-reset"])
+        
+        if self.limit and remaining <= settings.github_rate_limit_reserve:
+            logger.warning("GitHub rate limit budget low",
+                          budget=self.key,
+                          remaining=remaining,
+                          limit=self.limit,
+                          resets_in=round(max(0.0, (self.reset_at or 0) - time.time())))
+    
+    def reserve(self) -> float:
+        """Claim budget for one request, returning how long to wait before sending it"""
+        with self._lock:
+            self.requests += 1
+            if self.remaining is None or not self.limit or self.reset_at is None:
+                return 0.0
+            
+            now = time.time()
+            if now >= self.reset_at:
+                # The window has reset; the next response reports the new one
+                self.remaining = self.limit
+                self._next_slot = 0.0
+            window = max(0.0, self.reset_at - now)
+            usable = self.remaining - settings.github_rate_limit_reserve
+            self.remaining -= 1  # Corrected by the response headers
+            
+            if usable <= 0:
+                # Defer until the window resets rather than failing mid-job
+                delay = window + 1.0
+            elif self.remaining < self.limit * settings.github_rate_limit_pace_threshold:
+                # Spread what is left evenly over the rest of the window
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + window / usable
+                delay = slot - now
+            else:
+                delay = 0.0
+            
+            self.paced_seconds += delay
+            return delay
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "resets_in": round(max(0.0, self.reset_at - time.time())) if self.reset_at else None,
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "rate_limited": self.rate_limited,
+            "paced_seconds": round(self.paced_seconds, 3),
+        }
+
+_budgets: Dict[str, RateLimitBudget] = {}
+_budgets_lock = threading.Lock()
+
+def get_rate_limit_budget(key: str) -> RateLimitBudget:
+    """Get the process-wide budget for an installation or token"""
+    with _budgets_lock:
+        budget = _budgets.get(key)
+        if budget is None:
+            budget = _budgets[key] = RateLimitBudget(key)
+        return budget
+
+def installation_budget_key(installation_id: str) -> str:
+    """Budget key shared by every token of a GitHub App installation"""
+    return f"installation:{installation_id}"
+
+def token_budget_key(token: str) -> str:
+    """Budget key for a token with no known installation (the token itself is not exposed)"""
+    return f"token:{hashlib.sha256(token.encode('utf-8')).hexdigest()[:12]}"
+
+def wait_for_budget(budget: RateLimitBudget, delay: float) -> None:
+    """Sleep off a short rate limit delay in the calling worker thread
+    
+    Longer delays raise RateLimitDeferred so the caller waits on the event loop
+    instead of holding a shared executor thread.
+    """
+    if delay > settings.github_rate_limit_max_wait:
+        raise RuntimeError(
+            f"GitHub rate limit budget exhausted for {round(delay)}s "
+            f"(more than the {settings.github_rate_limit_max_wait}s allowed)"
+        )
+    if delay > settings.github_rate_limit_max_thread_wait:
+        raise RateLimitDeferred(budget.key, delay)
+    time.sleep(delay)
+
+def _public_budget_key(key: str) -> str:
+    """Budget key with its installation ID hashed, for metrics"""
+    kind, _, identifier = key.partition(":")
+    if kind != "installation":
+        return key
+    return f"{kind}:{hashlib.sha256(identifier.encode('utf-8')).hexdigest()[:12]}"
+
+def get_github_rate_limit_stats() -> Dict[str, Any]:
+    """Budget, pacing and conditional request counters for every installation in use (IDs are not exposed)"""
+    with _budgets_lock:
+        budgets = list(_budgets.values())
+    with _etag_cache_lock:
+        entries, cached_bytes = len(_etag_cache), _etag_cache.total_bytes
+    return {
+        "budgets": {_public_budget_key(budget.key): budget.snapshot() for budget in budgets},
+        "etag_cache_entries": entries,
+        "etag_cache_bytes": cached_bytes,
+    }
+
+# Cached (etag, status, headers, body) of conditional reads, keyed by budget, URL and Accept header
+_etag_cache = TTLCache(
+    settings.github_etag_cache_max_entries,
+    settings.github_etag_cache_ttl,
+    max_bytes=settings.github_etag_cache_max_bytes
+)
+_etag_cache_lock = threading.Lock()
+
+class GitHubTransportAdapter(HTTPAdapter):
+    """requests adapter that paces calls to the installation budget and revalidates reads with ETags"""
+    
+    def __init__(self, budget: RateLimitBudget, **kwargs):
+        self.budget = budget
+        super().__init__(**kwargs)
+    
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        cache_key = None
+        cached = None
+        if settings.github_conditional_requests and request.method == "GET" and self._is_conditional(request.url):
+            cache_key = (self.budget.key, request.url, request.headers.get("Accept"))
+            with _etag_cache_lock:
+                found, cached = _etag_cache.get(cache_key)
+            if found:
+                request.headers["If-None-Match"] = cached[0]
+        
+        for attempt in range(settings.github_rate_limit_max_retries + 1):
+            delay = self.budget.reserve()
+            if delay > 0:
+                wait_for_budget(self.budget, delay)
+            
+            response = super().send(request, **kwargs)
+            self.budget.record(response.headers)
+            
+            retry_after = self._rate_limit_retry_after(response)
+            if retry_after is None or attempt == settings.github_rate_limit_max_retries:
+                break
+            self.budget.rate_limited += 1
+            logger.warning("GitHub rate limited, retrying", budget=self.budget.key, retry_after=round(retry_after, 1))
+            response.close()
+            wait_for_budget(self.budget, retry_after)
+        
+        if cache_key is None:
+            return response
+        
+        if response.status_code == 304 and cached:
+            # Not counted against the rate limit; replay the cached body
+            self.budget.not_modified += 1
+            return self._replay(request, response, cached)
+        
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag:
+            with _etag_cache_lock:
+                _etag_cache.set(
+                    cache_key,
+                    (etag, response.status_code, dict(response.headers), response.content),
+                    size=len(response.content)
+                )
+        return response
+    
+    def _is_conditional(self, url: str) -> bool:
+        return bool(CONDITIONAL_PATHS.search(requests.utils.urlparse(url).path))
+    
+    def _rate_limit_retry_after(self, response: requests.Response) -> Optional[float]:
+        """Seconds to wait before retrying a rate limited response, or None if it was not rate limited"""
+        if response.status_code not in (403, 429):
+            return None
+        
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            # Secondary rate limits say how long to back off
+            return float(retry_after)
+        if response.headers.get("X-RateLimit-Remaining") == "0" and response.headers.get("X-RateLimit-Reset"):
+            return max(0.0, float(response.headers["X-RateLimit-Reset"]) - time.time()) + 1.0
+        return None
+    
+    def _replay(
+        self,
+        request: requests.PreparedRequest,
+        not_modified: requests.Response,
+        cached: Tuple[str, int, Dict[str, str], bytes]
+    ) -> requests.Response:
+        _, status, headers, body = cached
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.headers.update(not_modified.headers)  # Fresh rate limit headers
+        response._content = body
+        response.encoding = not_modified.encoding or requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+def install_github_transport(github: Any, budget_key: str) -> None:
+    """Route a PyGithub client's requests through the rate-limit-aware adapter"""
+    # PyGithub (1.59) keeps one persistent connection object per Requester, each with its own requests session
+    requester = github._Github__requester
+    connection = requester._Requester__createConnection()
+    adapter = GitHubTransportAdapter(
+        get_rate_limit_budget(budget_key),
+        max_retries=connection.retry,
+        pool_connections=connection.pool_size,
+        pool_maxsize=connection.pool_size
+    )
+    connection.session.mount(f"{connection.protocol}://", adapter)
@@ -0,0 +1,127 @@
+"""
+Background dependency health monitoring for readiness checks
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+import structlog
+from sqlalchemy import text
+
+from ..config import settings
+from ..models.database import AsyncSessionLocal
+from .github_app_service import GitHubAppService
+
+logger = structlog.get_logger()
+
+class HealthMonitor:
+    """Refreshes database, LLM and GitHub status in the background and serves the last result"""
+    
+    def __init__(self, github_app_service: GitHubAppService, interval: Optional[float] = None):
+        self.github_app_service = github_app_service
+        self.interval = interval or settings.health_check_interval
+        self.services: Dict[str, str] = {"database": "unknown", "llm": "unknown", "github": "unknown"}
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh: Optional[asyncio.Future] = None
+    
+    def start(self) -> None:
+        """Start the background refresh loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the background refresh loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._refresh is not None:
+            self._refresh.cancel()
+            self._refresh = None
+    
+    @property
+    def ready(self) -> bool:
+        """Ready to serve traffic once the database is reachable"""
+        return self.services["database"] == "healthy"
+    
+    @property
+    def status(self) -> str:
+        """Overall status from the last check"""
+        if self.checked_at is None:
+            return "starting"
+        if all(state in ("healthy", "not_configured") for state in self.services.values()):
+            return "healthy"
+        return "degraded" if self.ready else "unhealthy"
+    
+    async def snapshot(self) -> Dict[str, str]:
+        """Current service status, refreshed inline when no background loop is running (e.g. Lambda)"""
+        stale = self.checked_at is None or time.monotonic() - self.checked_at > self.interval
+        if stale and (self._task is None or self._task.done()):
+            await self.refresh()
+        return self.services
+    
+    async def refresh(self) -> None:
+        """Check all dependencies once (concurrent callers share one check)"""
+        if self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._check_all())
+        refresh = self._refresh
+        try:
+            await asyncio.shield(refresh)
+        finally:
+            if self._refresh is refresh and refresh.done():
+                self._refresh = None
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Health refresh failed", error=str(e))
+            await asyncio.sleep(self.interval)
+    
+    async def _check_all(self) -> None:
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            self._check("database", self._check_database),
+            self._check("llm", self._check_llm),
+            self._check("github", self._check_github),
+        )
+        previous = dict(self.services)
+        self.services = dict(results)
+        self.checked_at = time.monotonic()
+        
+        if self.services != previous:
+            logger.info("Dependency health changed",
+                       services=self.services,
+                       duration=round(time.perf_counter() - started, 3))
+    
+    async def _check(self, name: str, check: Callable[[], Awaitable[Optional[bool]]]):
+        try:
+            healthy = await asyncio.wait_for(check(), timeout=settings.health_check_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Health check timed out", service=name)
+            healthy = False
+        except Exception as e:
+            logger.warning("Health check failed", service=name, error=str(e))
+            healthy = False
+        
+        if healthy is None:
+            return name, "not_configured"
+        return name, "healthy" if healthy else "unhealthy"
+    
+    async def _check_database(self) -> bool:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+        return True
+    
+    async def _check_llm(self) -> Optional[bool]:
+        if not settings.openai_api_key:
+            return None
+        from .llm_service import LLMService  # Deferred: the OpenAI SDK is slow to import
+        return await LLMService(settings.openai_api_key, settings.llm_model).health_check()
+    
+    async def _check_github(self) -> bool:
+        return await self.github_app_service.health_check()
@@ -0,0 +1,151 @@
+"""
+Live job progress: in-process event fan-out and throttled persistence of job counters
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+import structlog
+from sqlalchemy import update
+
+from ..config import settings
+from ..models.database import AsyncSessionLocal, ConversionJob
+
+logger = structlog.get_logger()
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+class JobEventBroker:
+    """Fans out job events to SSE subscribers in this process"""
+    
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+    
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        """Deliver an event to every subscriber of a job (oldest events are dropped for slow readers)"""
+        for queue in list(self._subscribers.get(job_id, ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait((event, data))
+    
+    @asynccontextmanager
+    async def subscribe(self, job_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Receive (event, data) tuples for a job while the context is open"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[job_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[job_id].discard(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+job_event_broker = JobEventBroker()
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def job_state(job: ConversionJob) -> Dict[str, Any]:
+    """Progress fields of a job, as sent in SSE status events"""
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "stage": job.stage,
+        "files_total": job.files_total,
+        "files_processed": job.files_processed or 0,
+        "files_converted": job.files_converted or 0,
+        "pr_url": job.pr_url,
+        "error_message": job.error_message,
+    }
+
+def publish_job_status(job: ConversionJob) -> None:
+    """Publish a job's current state (e.g. after its final status is committed)"""
+    job_event_broker.publish(str(job.id), "status", job_state(job))
+
+class JobProgress:
+    """Reports pipeline progress for one job to SSE subscribers and the job row"""
+    
+    def __init__(self, job_id: str, broker: JobEventBroker = job_event_broker, persist: bool = True):
+        self.job_id = job_id
+        self.broker = broker
+        self.persist = persist
+        self.stage_name: Optional[str] = None
+        self.files_total: Optional[int] = None
+        self.files_processed = 0
+        self.files_converted = 0
+        self.pr_url: Optional[str] = None
+        self.source_commit_sha: Optional[str] = None
+        self.source_files: Optional[Dict[str, Dict[str, str]]] = None
+        self._last_flush = 0.0
+        self._flush_lock = asyncio.Lock()
+    
+    async def stage(self, stage: str, files_total: Optional[int] = None, **details) -> None:
+        """Record a pipeline stage transition"""
+        self.stage_name = stage
+        if files_total is not None:
+            self.files_total = files_total
+        self.broker.publish(self.job_id, "stage", {"stage": stage, "files_total": self.files_total, **details})
+        await self._flush(force=True)
+    
+    async def file_processed(self, path: str, outcome: str, converted_path: Optional[str] = None) -> None:
+        """Record a finished file (outcome: converted, cached, unchanged or failed)"""
+        self.files_processed += 1
+        if outcome != "failed":
+            self.files_converted += 1
+        self.broker.publish(self.job_id, "file", {
+            "path": path,
+            "converted_path": converted_path,
+            "outcome": outcome,
+            "files_total": self.files_total,
+            "files_processed": self.files_processed,
+            "files_converted": self.files_converted,
+        })
+        await self._flush()
+    
+    async def pull_request(self, pr_url: str) -> None:
+        """Record the created pull request"""
+        self.pr_url = pr_url
+        self.broker.publish(self.job_id, "pull_request", {"pr_url": pr_url})
+        await self._flush(force=True)
+    
+    async def source_snapshot(self, commit_sha: str, files: Dict[str, Dict[str, str]]) -> None:
+        """Record the source commit and per-file blobs converted, as the baseline for incremental runs"""
+        self.source_commit_sha = commit_sha
+        self.source_files = files
+        await self._flush(force=True)
+    
+    async def _flush(self, force: bool = False) -> None:
+        """Write counters to the job row, at most once per flush interval unless forced"""
+        if not self.persist:
+            return
+        if not force and time.monotonic() - self._last_flush < settings.job_progress_flush_interval:
+            return
+        # Skip overlapping writes from concurrent files; a later flush carries the newer counters
+        if not force and self._flush_lock.locked():
+            return
+        
+        async with self._flush_lock:
+            values = {
+                ConversionJob.stage: self.stage_name,
+                ConversionJob.files_total: self.files_total,
+                ConversionJob.files_processed: self.files_processed,
+                ConversionJob.files_converted: self.files_converted,
+            }
+            if self.pr_url:
+                values[ConversionJob.pr_url] = self.pr_url
+            if self.source_commit_sha:
+                values[ConversionJob.source_commit_sha] = self.source_commit_sha
+                values[ConversionJob.source_files] = json.dumps(self.source_files, sort_keys=True)
+            
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(update(ConversionJob).where(ConversionJob.id == self.job_id).values(values))
+                    await db.commit()
+                self._last_flush = time.monotonic()
+            except Exception as e:
+                # Progress is best effort; never fail the conversion over it
+                logger.warning("Failed to persist job progress", job_id=self.job_id, error=str(e))
@@ -0,0 +1,166 @@
+"""
+Durable job queue on top of the conversion_jobs table
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import structlog
+from sqlalchemy import or_, and_
+
+from ..config import settings
+from ..models.database import SessionLocal, ConversionJob
+
+logger = structlog.get_logger()
+
+class JobQueue:
+    """Postgres-backed queue: claims jobs with FOR UPDATE SKIP LOCKED and leases them to workers"""
+    
+    def __init__(
+        self,
+        lease_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_delay: Optional[int] = None
+    ):
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self.max_attempts = max_attempts or settings.job_max_attempts
+        self.retry_delay = retry_delay if retry_delay is not None else settings.job_retry_delay
+        # Queue calls get their own threads so heartbeats are never stuck behind
+        # GitHub or cache work saturating the default executor
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.worker_concurrency + 1,
+            thread_name_prefix="job-queue"
+        )
+    
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+    
+    async def claim(self, worker_id: str) -> Optional[Tuple[str, str]]:
+        """Claim the oldest runnable job, returning (job_id, user_id)"""
+        return await self._run(self._claim_sync, worker_id)
+    
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease on a job; False if the worker no longer owns it"""
+        return await self._run(self._heartbeat_sync, job_id, worker_id)
+    
+    async def complete(self, job_id: str, worker_id: str) -> None:
+        """Mark a claimed job as completed"""
+        await self._run(self._complete_sync, job_id, worker_id)
+    
+    async def fail(self, job_id: str, worker_id: str, error: str) -> None:
+        """Record a failed attempt, re-queueing the job until attempts run out"""
+        await self._run(self._fail_sync, job_id, worker_id, error)
+    
+    def close(self) -> None:
+        """Shut down the queue's threads"""
+        self._executor.shutdown(wait=False)
+    
+    def _claim_sync(self, worker_id: str) -> Optional[Tuple[str, str]]:
+        with SessionLocal() as db:
+            while True:
+                now = datetime.utcnow()
+                job = db.query(ConversionJob).filter(
+                    or_(
+                        and_(
+                            ConversionJob.status == "pending",
+                            or_(ConversionJob.run_after.is_(None), ConversionJob.run_after <= now)
+                        ),
+                        # Jobs whose worker stopped heartbeating
+                        and_(
+                            ConversionJob.status == "processing",
+                            ConversionJob.lease_expires_at < now
+                        )
+                    )
+                ).order_by(
+                    ConversionJob.created_at.asc()
+                ).with_for_update(skip_locked=True).limit(1).first()
+                
+                if not job:
+                    return None
+                
+                if job.status == "processing":
+                    logger.warning("Reclaiming job with expired lease",
+                                 job_id=str(job.id),
+                                 previous_worker=job.worker_id,
+                                 attempts=job.attempts)
+                
+                if (job.attempts or 0) >= self.max_attempts:
+                    job.status = "failed"
+                    job.error_message = job.error_message or "Job exceeded maximum attempts"
+                    job.completed_at = now
+                    job.worker_id = None
+                    job.lease_expires_at = None
+                    db.commit()
+                    logger.error("Job exceeded maximum attempts", job_id=str(job.id), attempts=job.attempts)
+                    continue
+                
+                job.status = "processing"
+                job.attempts = (job.attempts or 0) + 1
+                job.worker_id = worker_id
+                job.started_at = now
+                job.heartbeat_at = now
+                job.lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+                job.run_after = None
+                db.commit()
+                
+                logger.info("Job claimed", job_id=str(job.id), worker_id=worker_id, attempt=job.attempts)
+                return str(job.id), str(job.user_id)
+    
+    def _heartbeat_sync(self, job_id: str, worker_id: str) -> bool:
+        with SessionLocal() as db:
+            now = datetime.utcnow()
+            updated = db.query(ConversionJob).filter(
+                ConversionJob.id == job_id,
+                ConversionJob.worker_id == worker_id,
+                ConversionJob.status == "processing"
+            ).update({
+                ConversionJob.heartbeat_at: now,
+                ConversionJob.lease_expires_at: now + timedelta(seconds=self.lease_seconds)
+            }, synchronize_session=False)
+            db.commit()
+            return updated > 0
+    
+    def _complete_sync(self, job_id: str, worker_id: str) -> None:
+        with SessionLocal() as db:
+            job = db.query(ConversionJob).filter(
+                ConversionJob.id == job_id,
+                ConversionJob.worker_id == worker_id
+            ).first()
+            if not job or job.status != "processing":
+                logger.warning("Completed job no longer owned by worker", job_id=job_id, worker_id=worker_id)
+                return
+            
+            job.status = "completed"
+            job.completed_at = datetime.utcnow()
+            job.worker_id = None
+            job.lease_expires_at = None
+            db.commit()
+    
+    def _fail_sync(self, job_id: str, worker_id: str, error: str) -> None:
+        with SessionLocal() as db:
+            job = db.query(ConversionJob).filter(
+                ConversionJob.id == job_id,
+                ConversionJob.worker_id == worker_id
+            ).first()
+            if not job or job.status != "processing":
+                logger.warning("Failed job no longer owned by worker", job_id=job_id, worker_id=worker_id)
+                return
+            
+            now = datetime.utcnow()
+            job.error_message = error
+            job.worker_id = None
+            job.lease_expires_at = None
+            
+            if (job.attempts or 0) < self.max_attempts:
+                job.status = "pending"
+                job.run_after = now + timedelta(seconds=self.retry_delay * job.attempts)
+                logger.warning("Job attempt failed, will retry",
+                             job_id=job_id,
+                             attempt=job.attempts,
+                             run_after=job.run_after.isoformat())
+            else:
+                job.status = "failed"
+                job.completed_at = now
+                logger.error("Job failed after final attempt", job_id=job_id, attempts=job.attempts)
+            
+            db.commit()
@@ -0,0 +1,225 @@
+"""
+Classified retries, deadlines and straggler hedging for LLM requests
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import httpx
+import openai
+import structlog
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from ..config import settings
+from .llm_scheduler import LLMScheduler, get_llm_scheduler
+
+logger = structlog.get_logger()
+
+# Request timeout and conflict statuses; every 5xx is retried too. 429s are requeued by the
+# rate limit scheduler, which has already given up by the time one reaches this layer
+RETRYABLE_STATUS_CODES = {408, 409}
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient failures worth retrying: timeouts, connection errors and 5xx responses"""
+    if isinstance(error, (asyncio.TimeoutError, openai.APIConnectionError, httpx.TransportError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code is not None and (status_code in RETRYABLE_STATUS_CODES or status_code >= 500)
+
+class LatencyTracker:
+    """Latencies of recent successful requests for one kind of LLM call"""
+    
+    def __init__(self, window: int):
+        self._samples: Deque[float] = deque(maxlen=window)
+    
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile, or None until enough samples are observed"""
+        if not self._samples or len(self._samples) < settings.llm_hedge_min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class LLMResilience:
+    """Retries transient LLM failures with jittered backoff and hedges requests slower than the observed p95"""
+    
+    def __init__(self, scheduler: LLMScheduler):
+        self.scheduler = scheduler
+        self._latencies: Dict[str, LatencyTracker] = {}
+        
+        self.retries = 0
+        self.deadlines_exceeded = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+    
+    async def run(self, operation: str, request: Callable[[], Awaitable[Any]], estimated_tokens: int) -> Any:
+        """Send a raw-response request through the scheduler, retrying transient failures until the deadline"""
+        # Time spent queued in the scheduler for rate limit budget does not count towards the deadline
+        deadline = time.monotonic() + settings.llm_request_deadline
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(max(1, settings.llm_retry_max_attempts)) | (lambda retry_state: time.monotonic() >= deadline),
+            wait=wait_random_exponential(multiplier=settings.llm_retry_backoff_base, max=settings.llm_retry_backoff_max),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=lambda retry_state: self._before_retry(operation, retry_state),
+            reraise=True
+        )
+        async for attempt in retrying:
+            with attempt:
+                if time.monotonic() >= deadline:
+                    raise self._deadline_exceeded(operation)
+                sent = asyncio.Event()
+                queued_at = time.monotonic()
+                pending = asyncio.ensure_future(self._attempt(operation, request, estimated_tokens, sent))
+                try:
+                    admitted = asyncio.ensure_future(sent.wait())
+                    try:
+                        await asyncio.wait({pending, admitted}, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        admitted.cancel()
+                    deadline += time.monotonic() - queued_at
+                    
+                    try:
+                        return await asyncio.wait_for(pending, max(0.0, deadline - time.monotonic()))
+                    except asyncio.TimeoutError:
+                        if time.monotonic() >= deadline:
+                            raise self._deadline_exceeded(operation)
+                        raise
+                finally:
+                    if not pending.done():
+                        pending.cancel()
+    
+    def _deadline_exceeded(self, operation: str) -> asyncio.TimeoutError:
+        self.deadlines_exceeded += 1
+        return asyncio.TimeoutError(f"LLM {operation} request exceeded its {settings.llm_request_deadline}s deadline")
+    
+    def _before_retry(self, operation: str, retry_state: RetryCallState) -> None:
+        self.retries += 1
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        logger.warning("LLM request failed, retrying",
+                      operation=operation,
+                      attempt=retry_state.attempt_number,
+                      backoff=round(retry_state.next_action.sleep, 3) if retry_state.next_action else None,
+                      error=str(error) or type(error).__name__)
+    
+    async def _attempt(
+        self,
+        operation: str,
+        request: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        sent: asyncio.Event
+    ) -> Any:
+        """One attempt, duplicated once if the provider takes longer than usual to answer"""
+        hedge_after = self._hedge_delay(operation)
+        primary = asyncio.ensure_future(self._send(operation, request, estimated_tokens, sent))
+        if hedge_after is None:
+            return await primary
+        
+        hedge = None
+        try:
+            # Time spent queued for rate limit budget does not count towards the hedge delay
+            sending = asyncio.ensure_future(sent.wait())
+            try:
+                await asyncio.wait({primary, sending}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                sending.cancel()
+            if not primary.done():
+                await asyncio.wait({primary}, timeout=hedge_after)
+            if primary.done():
+                return primary.result()
+            
+            self.hedged += 1
+            logger.info("Hedging slow LLM request", operation=operation, hedge_after=round(hedge_after, 3))
+            hedge = asyncio.ensure_future(self._send(operation, request, estimated_tokens, asyncio.Event()))
+            
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both copies failed; surface the original request's error
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    async def _send(
+        self,
+        operation: str,
+        request: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        sent: asyncio.Event
+    ) -> Any:
+        started = time.monotonic()
+        
+        async def timed_request():
+            nonlocal started
+            started = time.monotonic()
+            sent.set()
+            return await request()
+        
+        response = await self.scheduler.run(timed_request, estimated_tokens)
+        self._tracker(operation).record(time.monotonic() - started)
+        return response
+    
+    def _tracker(self, operation: str) -> LatencyTracker:
+        tracker = self._latencies.get(operation)
+        if tracker is None:
+            tracker = self._latencies[operation] = LatencyTracker(settings.llm_latency_window)
+        return tracker
+    
+    def _hedge_delay(self, operation: str) -> Optional[float]:
+        """Seconds after sending before a duplicate request is issued, or None when not hedging"""
+        if not settings.llm_hedging_enabled:
+            return None
+        threshold = self._tracker(operation).percentile(settings.llm_hedge_percentile)
+        if threshold is None:
+            return None
+        return max(threshold, settings.llm_hedge_min_delay)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Retry and hedging counters with observed latency percentiles per operation"""
+        latency = {}
+        for operation, tracker in self._latencies.items():
+            p50, p95 = tracker.percentile(50), tracker.percentile(95)
+            latency[operation] = {
+                "samples": len(tracker),
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+        return {
+            "retries": self.retries,
+            "deadlines_exceeded": self.deadlines_exceeded,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "latency": latency,
+        }
+
+# One policy per API key, sharing that key's scheduler and latency history
+_policies: Dict[str, LLMResilience] = {}
+
+def get_llm_resilience(api_key: str) -> LLMResilience:
+    """Get the process-wide retry and hedging policy for an API key"""
+    policy = _policies.get(api_key)
+    if policy is None:
+        policy = _policies[api_key] = LLMResilience(get_llm_scheduler(api_key))
+    return policy
+
+def get_llm_resilience_stats() -> Dict[str, Any]:
+    """Retry and hedging metrics for every API key in use (keys are not exposed)"""
+    return {"resilience": [policy.snapshot() for policy in _policies.values()]}
@@ -0,0 +1,227 @@
+"""
+Process-wide LLM request scheduling against requests/tokens-per-minute budgets
+"""
+import asyncio
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+import structlog
+
+from ..config import settings
+
+logger = structlog.get_logger()
+
+# Durations in x-ratelimit-reset-* headers, e.g. "20ms", "1s", "6m0s"
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate limit reset duration into seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_SECONDS[unit] for amount, unit in parts)
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+class TokenBucket:
+    """Per-minute budget that refills continuously (unlimited until a limit is known)"""
+    
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit or None
+        self.available = float(self.limit) if self.limit else 0.0
+        self._updated = time.monotonic()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.limit:
+            self.available = min(float(self.limit), self.available + (now - self._updated) * self.limit / 60)
+        self._updated = now
+    
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be spent"""
+        if not self.limit:
+            return 0.0
+        self._refill()
+        # A request larger than the whole budget waits for a full bucket rather than forever
+        needed = min(amount, self.limit) - self.available
+        return max(0.0, needed * 60 / self.limit)
+    
+    def spend(self, amount: float) -> None:
+        if self.limit:
+            self._refill()
+            self.available -= amount
+    
+    def refund(self, amount: float) -> None:
+        if self.limit:
+            self._refill()
+            self.available = min(float(self.limit), self.available + amount)
+    
+    def sync(self, limit: int, remaining: int) -> None:
+        """Adopt the limit and remaining budget reported by the provider"""
+        self._refill()
+        known = self.limit is not None
+        self.limit = limit
+        # Requests admitted after this response was produced are not reflected in it yet,
+        # so the provider's figure may only lower the local estimate
+        self.available = float(min(remaining, limit, self.available if known else limit))
+    
+    def snapshot(self) -> Dict[str, Any]:
+        self._refill()
+        return {"limit": self.limit, "available": round(self.available) if self.limit else None}
+
+class LLMScheduler:
+    """Queues LLM requests so they spend the RPM/TPM quota evenly instead of bursting into 429s"""
+    
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = asyncio.Lock()  # FIFO: callers are admitted in arrival order
+        self._blocked_until = 0.0
+        # Until a first response reports the limits, send one request at a time
+        self._probed = asyncio.Event()
+        if requests_per_minute and tokens_per_minute:
+            # Both budgets are configured, so there is nothing to learn first
+            self._probed.set()
+        
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    async def run(self, request: Callable[[], Awaitable[Any]], estimated_tokens: int) -> Any:
+        """Send a raw-response request once budget allows, requeueing it on 429s; returns the parsed response"""
+        attempts = max(0, settings.llm_rate_limit_max_requeues) + 1
+        for attempt in range(attempts):
+            await self._acquire(estimated_tokens)
+            self.in_flight += 1
+            try:
+                raw = await request()
+            except Exception as e:
+                if getattr(e, "status_code", None) != 429:
+                    raise
+                response = getattr(e, "response", None)
+                self._on_rate_limited(response.headers if response is not None else {}, estimated_tokens)
+                if attempt == attempts - 1:
+                    raise
+                continue
+            finally:
+                self.in_flight -= 1
+                # Release queued callers however the probe ended, including cancellation
+                self._probed.set()
+            
+            parsed = raw.parse()
+            usage = getattr(parsed, "usage", None)
+            self._on_response(raw.headers, estimated_tokens, usage.total_tokens if usage else None)
+            return parsed
+    
+    async def _acquire(self, estimated_tokens: int) -> None:
+        queued_at = time.monotonic()
+        self.queue_depth += 1
+        try:
+            async with self._lock:
+                if not self._probed.is_set() and self.in_flight:
+                    await self._probed.wait()
+                while True:
+                    wait = max(
+                        self._blocked_until - time.monotonic(),
+                        self.requests.wait_time(1),
+                        self.tokens.wait_time(estimated_tokens)
+                    )
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                self.requests.spend(1)
+                self.tokens.spend(estimated_tokens)
+        finally:
+            self.queue_depth -= 1
+        
+        waited = time.monotonic() - queued_at
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited >= 1.0:
+            logger.info("LLM request waited for rate limit budget",
+                       wait=round(waited, 3),
+                       queue_depth=self.queue_depth)
+    
+    def _on_response(self, headers: Mapping[str, str], estimated_tokens: int, used_tokens: Optional[int]) -> None:
+        """Update budgets from x-ratelimit-* headers, or from reported usage when there are none"""
+        synced_tokens = self._sync(headers)
+        if not synced_tokens and used_tokens is not None:
+            # Estimates include the full completion allowance; give back what was not used
+            self.tokens.refund(estimated_tokens - used_tokens)
+    
+    def _on_rate_limited(self, headers: Mapping[str, str], estimated_tokens: int) -> None:
+        """Pause every queued request until the provider's reset time"""
+        self.rate_limited += 1
+        self._sync(headers)
+        retry_after = (
+            parse_duration(headers.get("retry-after"))
+            or max(parse_duration(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                   parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0)
+            or settings.llm_rate_limit_default_retry_after
+        )
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        logger.warning("LLM rate limited, pausing requests",
+                      retry_after=round(retry_after, 3),
+                      estimated_tokens=estimated_tokens,
+                      queue_depth=self.queue_depth)
+    
+    def _sync(self, headers: Mapping[str, str]) -> bool:
+        """Adopt provider-reported budgets; True when the token budget was updated"""
+        limit = _header_int(headers, "x-ratelimit-limit-requests")
+        remaining = _header_int(headers, "x-ratelimit-remaining-requests")
+        if limit and remaining is not None:
+            self.requests.sync(limit, remaining)
+        
+        limit = _header_int(headers, "x-ratelimit-limit-tokens")
+        remaining = _header_int(headers, "x-ratelimit-remaining-tokens")
+        if limit and remaining is not None:
+            self.tokens.sync(limit, remaining)
+            return True
+        return False
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth, wait times and remaining budgets"""
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "avg_wait_ms": round(self.total_wait / self.admitted * 1000, 3) if self.admitted else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "paused_for_ms": round(max(0.0, self._blocked_until - time.monotonic()) * 1000, 3),
+            "requests_per_minute": self.requests.snapshot(),
+            "tokens_per_minute": self.tokens.snapshot(),
+        }
+
+# One scheduler per API key (rate limits are per key), shared by every LLMService in the process
+_schedulers: Dict[str, LLMScheduler] = {}
+
+def get_llm_scheduler(api_key: str) -> LLMScheduler:
+    """Get the process-wide scheduler for an API key"""
+    scheduler = _schedulers.get(api_key)
+    if scheduler is None:
+        scheduler = _schedulers[api_key] = LLMScheduler(
+            settings.llm_rate_limit_rpm,
+            settings.llm_rate_limit_tpm
+        )
+    return scheduler
+
+def get_llm_scheduler_stats() -> Dict[str, Any]:
+    """Scheduler metrics for every API key in use (keys are not exposed)"""
+    return {"schedulers": [scheduler.snapshot() for scheduler in _schedulers.values()]}
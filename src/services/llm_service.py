@@ -2,34 +2,147 @@
 LLM service for multi-language to Python conversion
 """
 import asyncio
-from typing import Optional
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+import httpx
 import structlog
-import openai
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from ..config import settings
+from ..utils.chunking import estimate_tokens, extract_shared_context, merge_python_chunks, plan_chunks
+from .llm_resilience import get_llm_resilience
+from .prompts import get_prompts
 
 logger = structlog.get_logger()
 
+# (context window, completion token limit, JSON mode) by model name prefix; the longest match wins
+MODEL_LIMITS: Dict[str, Tuple[int, Optional[int], bool]] = {
+    "gpt-4": (8192, None, False),
+    "gpt-4-32k": (32768, None, False),
+    "gpt-4-1106": (128000, 4096, True),
+    "gpt-4-0125": (128000, 4096, True),
+    "gpt-4-turbo": (128000, 4096, True),
+    "gpt-4o": (128000, 4096, True),
+    "gpt-3.5-turbo": (16385, 4096, True),
+    "gpt-3.5-turbo-16k": (16385, None, False),
+    "gpt-3.5-turbo-0613": (4096, None, False),
+}
+# Unknown models are assumed to have the smallest common context window
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Converted Python plus notes runs to a few times the source size
+PACKED_OUTPUT_RATIO = 3
+# Headroom for the difference between estimated and real token counts
+CONTEXT_MARGIN_TOKENS = 256
+
+def model_limits(model: str) -> Tuple[int, Optional[int], bool]:
+    """Context window, completion token limit and JSON mode support for a model (settings override)"""
+    prefix = max((prefix for prefix in MODEL_LIMITS if model.startswith(prefix)), key=len, default=None)
+    context_window, max_output, json_mode = MODEL_LIMITS[prefix] if prefix else (DEFAULT_CONTEXT_WINDOW, None, False)
+    if settings.llm_context_window:
+        context_window = settings.llm_context_window
+    if settings.llm_json_mode is not None:
+        json_mode = settings.llm_json_mode
+    return context_window, max_output, json_mode
+
+# One pooled client per API key, shared by every LLMService in the process
+_clients: Dict[str, AsyncOpenAI] = {}
+
+def get_llm_client(api_key: str) -> AsyncOpenAI:
+    """Get the process-wide AsyncOpenAI client for an API key"""
+    client = _clients.get(api_key)
+    if client is None:
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.llm_timeout,
+                connect=settings.llm_connect_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry
+            )
+        )
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=settings.llm_base_url,
+            timeout=settings.llm_timeout,
+            # Retries are classified and paced by LLMResilience and the rate limit scheduler
+            max_retries=0,
+            http_client=http_client
+        )
+        _clients[api_key] = client
+        logger.info("Created pooled LLM client",
+                   max_connections=settings.llm_max_connections,
+                   timeout=settings.llm_timeout)
+    return client
+
+async def close_llm_clients() -> None:
+    """Close all pooled LLM clients (call on shutdown)"""
+    while _clients:
+        _, client = _clients.popitem()
+        await client.close()
+
 class LLMService:
     """Service for LLM operations"""
     
     def __init__(self, api_key: str, model: str = "gpt-4"):
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_llm_client(api_key)
+        self.resilience = get_llm_resilience(api_key)
         self.model = model
     
     async def health_check(self) -> bool:
         """Check LLM service health"""
         try:
-            # Test API access with a simple request
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": "test"}],
-                max_tokens=1
-            )
+            # Metadata lookup checks the key and model without spending tokens
+            await self.client.models.retrieve(self.model)
             return True
         except Exception as e:
             logger.error("LLM health check failed", error=str(e))
             return False
     
+    async def _complete(self, operation: str, messages: List[Dict[str, str]], max_tokens: int, **options):
+        """Create a chat completion through the rate limit scheduler, retrying transient failures"""
+        # Providers count the completion allowance against the token budget up front
+        estimated_tokens = sum(estimate_tokens(message["content"]) for message in messages) + max_tokens
+        return await self.resilience.run(
+            operation,
+            lambda: self.client.chat.completions.with_raw_response.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                **options
+            ),
+            estimated_tokens
+        )
+    
+    def prompt_version(self, source_language: str, target_language: str = "python") -> str:
+        """Content hash of the compiled conversion prompts for a language pair"""
+        return get_prompts(source_language, target_language).version
+    
+    def max_packed_source_tokens(self, source_language: str, target_language: str = "python") -> int:
+        """Estimated source tokens a packed request can carry and still fit its output in the model's limits"""
+        context_window, max_output, _ = model_limits(self.model)
+        prompts = get_prompts(source_language, target_language)
+        overhead = estimate_tokens(prompts.system_prompt) + estimate_tokens(prompts.packed_prompt([])) + CONTEXT_MARGIN_TOKENS
+        budget = (context_window - overhead) // (1 + PACKED_OUTPUT_RATIO)
+        if max_output:
+            budget = min(budget, max_output // PACKED_OUTPUT_RATIO)
+        return max(0, min(budget, settings.llm_packing_max_output_tokens // PACKED_OUTPUT_RATIO))
+    
+    def _build_prompts(
+        self,
+        source_content: str,
+        file_path: str,
+        source_language: str,
+        target_language: str = "python",
+        context: Optional[str] = None
+    ) -> tuple[str, str]:
+        """Build system and user prompts for a conversion"""
+        prompts = get_prompts(source_language, target_language)
+        return prompts.system_prompt, prompts.user_prompt(source_content, file_path, context)
+    
     async def convert_code_to_python(
         self,
         source_content: str,
@@ -38,145 +151,174 @@ class LLMService:
         target_language: str = "python",
         context: Optional[str] = None
     ) -> tuple[str, str]:
-        """Convert source code to Python"""
+        """Convert source code to Python, splitting oversized files into chunks"""
+        if (
+            settings.llm_chunking_enabled
+            and target_language == "python"
+            and estimate_tokens(source_content) > settings.llm_chunk_threshold_tokens
+        ):
+            return await self._convert_in_chunks(
+                source_content, file_path, source_language, target_language
+            )
+        
+        return await self._convert_source(
+            source_content, file_path, source_language, target_language, context
+        )
+    
+    async def convert_files_packed(
+        self,
+        files: List[Tuple[str, str]],
+        source_language: str,
+        target_language: str = "python"
+    ) -> Dict[str, Tuple[str, str]]:
+        """Convert several small (path, source) files of one language in a single request
         
-        # Language-specific conversion instructions with intelligent library selection
-        language_instructions = {
-            "shell": "shell scripts using the most appropriate Python libraries instead of subprocess when possible",
-            "powershell": "PowerShell scripts using native Python libraries rather than subprocess calls",
-            "typescript": "TypeScript code to Python, maintaining type safety with proper type hints",
-            "javascript": "JavaScript code to Python, using asyncio for async patterns and appropriate web frameworks",
-            "go": "Go code to Python, adapting goroutines to asyncio and using concurrent.futures",
-            "rust": "Rust code to Python, maintaining safety concepts with proper error handling",
-            "ruby": "Ruby code to Python, adapting Ruby idioms to Pythonic patterns",
-            "php": "PHP code to Python, using Flask/FastAPI for web functionality",
-            "java": "Java code to Python, simplifying with Pythonic patterns and appropriate libraries",
-            "scala": "Scala code to Python, adapting functional programming with functools and itertools",
-            "kotlin": "Kotlin code to Python, maintaining null safety with Optional types",
-            "swift": "Swift code to Python, adapting patterns to cross-platform equivalents",
-            "csharp": "C# code to Python, using appropriate Python equivalents for .NET patterns",
-            "cpp": "C++ code to Python, using numpy/scipy for performance-critical sections",
-            "c": "C code to Python, using appropriate system libraries and ctypes when needed",
-            "perl": "Perl code to Python, using re module and string processing libraries",
-            "r": "R code to Python using pandas, numpy, matplotlib, and scipy for data analysis",
-            "lua": "Lua code to Python, adapting scripting patterns appropriately",
-            "dart": "Dart code to Python, adapting patterns with appropriate web/mobile frameworks",
-            "groovy": "Groovy code to Python, using appropriate build automation libraries"
-        }
+        Returns (converted_code, conversion_notes) by path; files missing from the
+        response are left out for the caller to convert individually.
+        """
+        # The language's system prompt is sent once for the whole pack
+        prompts = get_prompts(source_language, target_language)
+        system_prompt, user_prompt = prompts.system_prompt, prompts.packed_prompt(files)
         
-        conversion_instruction = language_instructions.get(
-            source_language, 
-            f"{source_language} code to Python"
+        # The completion allowance is whatever the prompt leaves of the context window
+        context_window, max_output, json_mode = model_limits(self.model)
+        max_tokens = min(
+            settings.llm_packing_max_output_tokens,
+            max_output or settings.llm_packing_max_output_tokens,
+            context_window - estimate_tokens(system_prompt) - estimate_tokens(user_prompt) - CONTEXT_MARGIN_TOKENS
         )
+        source_tokens = sum(estimate_tokens(source) for _, source in files)
+        if max_tokens < source_tokens:
+            raise ValueError(
+                f"Packed request for {len(files)} files leaves {max_tokens} completion tokens in {self.model}'s context window"
+            )
+        # Models without JSON mode reject response_format; their fenced JSON is parsed below
+        options = {"response_format": {"type": "json_object"}} if json_mode else {}
         
-        system_prompt = f"""
-You are an expert Python developer with deep knowledge of the Python ecosystem and best practices. Your task is to intelligently convert {source_language} code to high-quality, production-ready Python code.
-
-CRITICAL CONVERSION PRINCIPLES:
-
-1. **INTELLIGENT LIBRARY SELECTION**: Choose the best Python library for each task, NOT just subprocess equivalents:
-   - AWS CLI commands → boto3 (AWS SDK for Python)
-   - Docker commands → docker-py library
-   - Git commands → GitPython library
-   - HTTP requests → requests or httpx library
-   - Database operations → appropriate database drivers (psycopg2, pymongo, etc.)
-   - File operations → pathlib and built-in file operations
-   - JSON/XML processing → json/xml.etree libraries
-   - System operations → os, shutil, platform modules
-   - Network operations → socket, urllib, or specialized libraries
-
-2. **CODE QUALITY & PYTHONIC PATTERNS**:
-   - Use proper error handling with specific exception types
-   - Implement comprehensive logging with structured logging
-   - Add detailed docstrings and type hints
-   - Follow PEP 8 and Python best practices
-   - Use context managers for resource management
-   - Implement proper async/await patterns when beneficial
-
-3. **MAINTAINABILITY & EXTENSIBILITY**:
-   - Create modular, reusable functions
-   - Use configuration management (environment variables, config files)
-   - Implement proper separation of concerns
-   - Add comprehensive error handling and recovery
-   - Include retry logic for external service calls
-   - Make code easily testable and debuggable
-
-4. **PERFORMANCE & EFFICIENCY**:
-   - Use appropriate data structures (sets, deques, etc.)
-   - Implement connection pooling for databases/APIs
-   - Use generators for memory efficiency
-   - Consider concurrent execution with asyncio or threading
-   - Cache results when appropriate
-
-5. **SECURITY & BEST PRACTICES**:
-   - Never hardcode credentials (use environment variables)
-   - Implement input validation and sanitization
-   - Use secure communication protocols
-   - Follow principle of least privilege
-   - Handle sensitive data appropriately
-
-SPECIFIC TECHNOLOGY MAPPINGS:
-- AWS CLI → boto3 with proper session management and error handling
-- cURL/wget → requests with session management and retries
-- grep/awk/sed → Python string methods, re module, or pandas
-- find → pathlib.Path.glob() or os.walk()
-- tar/zip → tarfile/zipfile modules
-- ps/top → psutil library
-- systemctl → systemd-python or subprocess only when necessary
-- Database CLIs → native Python database drivers
-- Package managers → pip-tools, poetry, or subprocess when absolutely necessary
-
-CONVERSION APPROACH:
-1. Analyze the {source_language} code functionality and intent
-2. Identify the best Python libraries and patterns for each operation
-3. Restructure code for optimal Python architecture
-4. Add comprehensive error handling and logging
-5. Include proper configuration management
-6. Ensure code is production-ready with monitoring capabilities
-
-Focus on converting {conversion_instruction}.
-
-IMPORTANT: Prioritize native Python libraries over subprocess calls. Only use subprocess when:
-- No suitable Python library exists
-- System-level operations require shell interaction
-- Performance/compatibility requires external tools
-
-Always explain your library choices and architectural decisions in the conversion notes.
-"""
-
-        user_prompt = f"""
-Convert the following {source_language} code to {target_language} using the most appropriate Python libraries and patterns:
-
-File: {file_path}
-{f"Context: {context}" if context else ""}
-
-{source_language.title()} Code:
-```{source_language}
-{source_content}
-```
-
-CONVERSION REQUIREMENTS:
-1. **Smart Library Selection**: Use the best Python library for each operation (e.g., boto3 for AWS, requests for HTTP, GitPython for Git)
-2. **Production Quality**: Include error handling, logging, configuration management, and retry logic
-3. **Pythonic Code**: Use proper Python idioms, type hints, context managers, and PEP 8 compliance
-4. **Maintainable Architecture**: Create modular, testable, and extensible code structure
-5. **Security**: Use environment variables for credentials, validate inputs, handle sensitive data properly
-
-Please provide:
-1. **Converted Python Code**: High-quality, production-ready Python implementation
-2. **Library Choices**: Explanation of why specific Python libraries were chosen over subprocess calls
-3. **Architecture Decisions**: Key design decisions that improve maintainability and extensibility
-4. **Dependencies**: List of required Python packages (for requirements.txt)
-5. **Configuration**: Any environment variables or configuration needed
-6. **Usage Examples**: How to run and configure the converted code
-
-Focus on creating the BEST possible Python implementation, not just a direct translation.
-"""
+        try:
+            response = await self._complete(
+                "convert_packed",
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.1,
+                max_tokens=max_tokens,
+                **options
+            )
+        except Exception as e:
+            logger.error("Failed to convert packed files",
+                        files=len(files),
+                        source_language=source_language,
+                        error=str(e))
+            raise
+        
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            raise ValueError(f"Packed response for {len(files)} files was truncated")
+        
+        # Tolerate a fenced JSON block from models that ignore response_format
+        content = re.sub(r"^```(?:json)?\s*|\s*```$", "", choice.message.content.strip())
+        entries = json.loads(content).get("files", [])
+        
+        requested = {file_path for file_path, _ in files}
+        converted = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            file_path = entry.get("path")
+            code = entry.get("code")
+            if file_path in requested and isinstance(code, str) and code.strip():
+                notes = entry.get("notes") or "Code converted using best-practice Python libraries and patterns"
+                converted[file_path] = (code.strip(), str(notes).strip())
+        
+        logger.info("Packed files converted",
+                   files=len(files),
+                   converted=len(converted),
+                   source_language=source_language,
+                   target_language=target_language,
+                   prompt_tokens=response.usage.prompt_tokens if response.usage else None)
+        return converted
+    
+    async def _convert_in_chunks(
+        self,
+        source_content: str,
+        file_path: str,
+        source_language: str,
+        target_language: str
+    ) -> tuple[str, str]:
+        """Convert a large file chunk by chunk in parallel and stitch the results"""
+        chunks = plan_chunks(source_content, settings.llm_chunk_max_tokens)
+        imports, signatures = extract_shared_context(source_content)
+        
+        logger.info("Converting file in chunks",
+                   file_path=file_path,
+                   chunks=len(chunks),
+                   estimated_tokens=estimate_tokens(source_content))
+        
+        shared_context = ""
+        if imports:
+            shared_context += "\nImports used by the whole file:\n" + "\n".join(imports)
+        if signatures:
+            shared_context += "\nTop-level declarations in the whole file:\n" + "\n".join(signatures)
+        
+        # The caller holds one of the job's concurrency slots for the whole file
+        semaphore = asyncio.Semaphore(max(1, settings.llm_chunk_concurrency))
+        
+        async def convert_chunk(index: int, chunk: str, containers: Tuple[str, ...]) -> tuple[str, str]:
+            context = (
+                f"This is part {index} of {len(chunks)} of a large file that is converted in parts "
+                f"and stitched back into one module. "
+            )
+            if containers:
+                # Members of a class split across parts go back under the class converted in an earlier part
+                context += (
+                    f"This part holds members of the class below, whose declaration is converted in an "
+                    f"earlier part:\n{containers[-1]}\nReturn only the converted member definitions "
+                    f"(methods and class attributes) indented by four spaces, without the class statement "
+                    f"or any module-level code."
+                )
+            else:
+                context += (
+                    "Convert only the code in this part, refer to declarations from other parts by name, "
+                    "and do not add a main entry point unless this part contains one."
+                )
+            async with semaphore:
+                return await self._convert_source(
+                    chunk, file_path, source_language, target_language, context + shared_context
+                )
+        
+        results = await asyncio.gather(*[
+            convert_chunk(index, chunk, containers)
+            for index, (chunk, containers) in enumerate(chunks, start=1)
+        ])
+        
+        converted_code = merge_python_chunks(
+            [code for code, _ in results],
+            [len(containers) for _, containers in chunks]
+        )
+        conversion_notes = "\n\n".join(
+            f"Part {index}: {notes}" for index, (_, notes) in enumerate(results, start=1)
+        )
+        return converted_code, conversion_notes
+    
+    async def _convert_source(
+        self,
+        source_content: str,
+        file_path: str,
+        source_language: str,
+        target_language: str = "python",
+        context: Optional[str] = None
+    ) -> tuple[str, str]:
+        """Convert source code to Python in a single request"""
+        system_prompt, user_prompt = self._build_prompts(
+            source_content, file_path, source_language, target_language, context
+        )
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            response = await self._complete(
+                "convert",
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
@@ -260,9 +402,9 @@ Keep it professional and informative.
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+            response = await self._complete(
+                "pr_description",
+                [{"role": "user", "content": prompt}],
                 temperature=0.3,
                 max_tokens=1000
             )
@@ -0,0 +1,240 @@
+"""
+Versioned conversion prompt templates, compiled once per language pair
+"""
+import hashlib
+from typing import Dict, List, Optional, Tuple
+import jinja2
+import structlog
+
+from ..config import settings
+
+logger = structlog.get_logger()
+
+# Bump to invalidate cached conversions without changing the prompt text
+PROMPT_REVISION = "1"
+
+# Language-specific conversion instructions with intelligent library selection
+LANGUAGE_INSTRUCTIONS = {
+    "shell": "shell scripts using the most appropriate Python libraries instead of subprocess when possible",
+    "powershell": "PowerShell scripts using native Python libraries rather than subprocess calls",
+    "typescript": "TypeScript code to Python, maintaining type safety with proper type hints",
+    "javascript": "JavaScript code to Python, using asyncio for async patterns and appropriate web frameworks",
+    "go": "Go code to Python, adapting goroutines to asyncio and using concurrent.futures",
+    "rust": "Rust code to Python, maintaining safety concepts with proper error handling",
+    "ruby": "Ruby code to Python, adapting Ruby idioms to Pythonic patterns",
+    "php": "PHP code to Python, using Flask/FastAPI for web functionality",
+    "java": "Java code to Python, simplifying with Pythonic patterns and appropriate libraries",
+    "scala": "Scala code to Python, adapting functional programming with functools and itertools",
+    "kotlin": "Kotlin code to Python, maintaining null safety with Optional types",
+    "swift": "Swift code to Python, adapting patterns to cross-platform equivalents",
+    "csharp": "C# code to Python, using appropriate Python equivalents for .NET patterns",
+    "cpp": "C++ code to Python, using numpy/scipy for performance-critical sections",
+    "c": "C code to Python, using appropriate system libraries and ctypes when needed",
+    "perl": "Perl code to Python, using re module and string processing libraries",
+    "r": "R code to Python using pandas, numpy, matplotlib, and scipy for data analysis",
+    "lua": "Lua code to Python, adapting scripting patterns appropriately",
+    "dart": "Dart code to Python, adapting patterns with appropriate web/mobile frameworks",
+    "groovy": "Groovy code to Python, using appropriate build automation libraries"
+}
+
+# Identical for every language pair and placed first, so providers can reuse the cached prefix
+SYSTEM_PREFIX_TEMPLATE = """
+You are an expert Python developer with deep knowledge of the Python ecosystem and best practices. Your task is to intelligently convert source code to high-quality, production-ready Python code.
+
+CRITICAL CONVERSION PRINCIPLES:
+
+1. **INTELLIGENT LIBRARY SELECTION**: Choose the best Python library for each task, NOT just subprocess equivalents:
+   - AWS CLI commands → boto3 (AWS SDK for Python)
+   - Docker commands → docker-py library
+   - Git commands → GitPython library
+   - HTTP requests → requests or httpx library
+   - Database operations → appropriate database drivers (psycopg2, pymongo, etc.)
+   - File operations → pathlib and built-in file operations
+   - JSON/XML processing → json/xml.etree libraries
+   - System operations → os, shutil, platform modules
+   - Network operations → socket, urllib, or specialized libraries
+
+2. **CODE QUALITY & PYTHONIC PATTERNS**:
+   - Use proper error handling with specific exception types
+   - Implement comprehensive logging with structured logging
+   - Add detailed docstrings and type hints
+   - Follow PEP 8 and Python best practices
+   - Use context managers for resource management
+   - Implement proper async/await patterns when beneficial
+
+3. **MAINTAINABILITY & EXTENSIBILITY**:
+   - Create modular, reusable functions
+   - Use configuration management (environment variables, config files)
+   - Implement proper separation of concerns
+   - Add comprehensive error handling and recovery
+   - Include retry logic for external service calls
+   - Make code easily testable and debuggable
+
+4. **PERFORMANCE & EFFICIENCY**:
+   - Use appropriate data structures (sets, deques, etc.)
+   - Implement connection pooling for databases/APIs
+   - Use generators for memory efficiency
+   - Consider concurrent execution with asyncio or threading
+   - Cache results when appropriate
+
+5. **SECURITY & BEST PRACTICES**:
+   - Never hardcode credentials (use environment variables)
+   - Implement input validation and sanitization
+   - Use secure communication protocols
+   - Follow principle of least privilege
+   - Handle sensitive data appropriately
+
+SPECIFIC TECHNOLOGY MAPPINGS:
+- AWS CLI → boto3 with proper session management and error handling
+- cURL/wget → requests with session management and retries
+- grep/awk/sed → Python string methods, re module, or pandas
+- find → pathlib.Path.glob() or os.walk()
+- tar/zip → tarfile/zipfile modules
+- ps/top → psutil library
+- systemctl → systemd-python or subprocess only when necessary
+- Database CLIs → native Python database drivers
+- Package managers → pip-tools, poetry, or subprocess when absolutely necessary
+
+CONVERSION APPROACH:
+1. Analyze the source code functionality and intent
+2. Identify the best Python libraries and patterns for each operation
+3. Restructure code for optimal Python architecture
+4. Add comprehensive error handling and logging
+5. Include proper configuration management
+6. Ensure code is production-ready with monitoring capabilities
+
+IMPORTANT: Prioritize native Python libraries over subprocess calls. Only use subprocess when:
+- No suitable Python library exists
+- System-level operations require shell interaction
+- Performance/compatibility requires external tools
+
+Always explain your library choices and architectural decisions in the conversion notes.
+"""
+
+SYSTEM_LANGUAGE_TEMPLATE = """
+SOURCE LANGUAGE: {{ source_language }}
+TARGET LANGUAGE: {{ target_language }}
+
+Focus on converting {{ conversion_instruction }}.
+"""
+
+# Static instructions come before the file so they stay inside the cacheable prefix
+USER_TEMPLATE = """
+Convert the {{ source_language }} code at the end of this message to {{ target_language }} using the most appropriate Python libraries and patterns.
+
+CONVERSION REQUIREMENTS:
+1. **Smart Library Selection**: Use the best Python library for each operation (e.g., boto3 for AWS, requests for HTTP, GitPython for Git)
+2. **Production Quality**: Include error handling, logging, configuration management, and retry logic
+3. **Pythonic Code**: Use proper Python idioms, type hints, context managers, and PEP 8 compliance
+4. **Maintainable Architecture**: Create modular, testable, and extensible code structure
+5. **Security**: Use environment variables for credentials, validate inputs, handle sensitive data properly
+
+Please provide:
+1. **Converted Python Code**: High-quality, production-ready Python implementation
+2. **Library Choices**: Explanation of why specific Python libraries were chosen over subprocess calls
+3. **Architecture Decisions**: Key design decisions that improve maintainability and extensibility
+4. **Dependencies**: List of required Python packages (for requirements.txt)
+5. **Configuration**: Any environment variables or configuration needed
+6. **Usage Examples**: How to run and configure the converted code
+
+Focus on creating the BEST possible Python implementation, not just a direct translation.
+
+File: {{ file_path }}
+{% if context %}Context: {{ context }}
+{% endif %}
+{{ source_language | title }} Code:
+```{{ source_language }}
+{{ source_content }}
+```
+"""
+
+PACKED_USER_TEMPLATE = """
+Convert each of the {{ source_language }} files at the end of this message to {{ target_language }} using the most appropriate Python libraries and patterns. The files are independent: convert every file separately and do not merge or share code between them.
+
+CONVERSION REQUIREMENTS:
+1. **Smart Library Selection**: Use the best Python library for each operation (e.g., boto3 for AWS, requests for HTTP, GitPython for Git)
+2. **Production Quality**: Include error handling, logging, configuration management, and retry logic
+3. **Pythonic Code**: Use proper Python idioms, type hints, context managers, and PEP 8 compliance
+4. **Security**: Use environment variables for credentials, validate inputs, handle sensitive data properly
+
+Respond with a single JSON object and nothing else, with one entry per file in the same order:
+{"files": [{"path": "<file path exactly as given>", "code": "<complete converted {{ target_language }} module>", "notes": "<library choices, architecture decisions, dependencies and configuration>"}]}
+
+Files to convert ({{ files | length }}):
+{% for file_path, source_content in files %}
+### File {{ loop.index }}: {{ file_path }}
+```{{ source_language }}
+{{ source_content }}
+```
+{% endfor %}
+"""
+
+_environment = jinja2.Environment(
+    autoescape=False,
+    undefined=jinja2.StrictUndefined,
+    keep_trailing_newline=True
+)
+
+class PromptSet:
+    """Compiled conversion prompts for one (source, target) language pair"""
+    
+    def __init__(self, source_language: str, target_language: str):
+        self.source_language = source_language
+        self.target_language = target_language
+        
+        # The system prompt has no per-file parts, so it is rendered once
+        self.system_prompt = _environment.from_string(SYSTEM_PREFIX_TEMPLATE).render() + _environment.from_string(
+            SYSTEM_LANGUAGE_TEMPLATE
+        ).render(
+            source_language=source_language,
+            target_language=target_language,
+            conversion_instruction=LANGUAGE_INSTRUCTIONS.get(source_language, f"{source_language} code to Python")
+        )
+        self._user_template = _environment.from_string(USER_TEMPLATE)
+        self._packed_template = _environment.from_string(PACKED_USER_TEMPLATE)
+        
+        digest = hashlib.sha256("\0".join([
+            PROMPT_REVISION,
+            self.system_prompt,
+            USER_TEMPLATE,
+            PACKED_USER_TEMPLATE,
+            source_language,
+            target_language,
+        ]).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+    
+    def user_prompt(self, source_content: str, file_path: str, context: Optional[str] = None) -> str:
+        """Render the prompt converting one file"""
+        return self._user_template.render(
+            source_language=self.source_language,
+            target_language=self.target_language,
+            file_path=file_path,
+            context=context,
+            source_content=source_content
+        )
+    
+    def packed_prompt(self, files: List[Tuple[str, str]]) -> str:
+        """Render the prompt converting several (path, source) files in one request"""
+        return self._packed_template.render(
+            source_language=self.source_language,
+            target_language=self.target_language,
+            files=files
+        )
+
+_prompt_sets: Dict[Tuple[str, str], PromptSet] = {}
+
+def get_prompts(source_language: str, target_language: str = "python") -> PromptSet:
+    """Get the compiled prompts for a language pair, compiling them on first use"""
+    key = (source_language, target_language)
+    prompts = _prompt_sets.get(key)
+    if prompts is None:
+        prompts = _prompt_sets[key] = PromptSet(source_language, target_language)
+    return prompts
+
+def compile_prompts(target_language: str = "python") -> None:
+    """Compile prompts for every supported source language up front"""
+    for source_language in sorted(set(settings.supported_extensions.values())):
+        get_prompts(source_language, target_language)
+    logger.debug("Compiled conversion prompts", pairs=len(_prompt_sets))
+
+compile_prompts()
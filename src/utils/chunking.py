@@ -0,0 +1,279 @@
+"""
+Source splitting and stitching for chunked conversion of large files
+"""
+import re
+import textwrap
+from typing import List, Optional, Tuple
+
+# Rough token estimate for code (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+# Lines that pull in dependencies, shared with every chunk as context
+IMPORT_PATTERN = re.compile(
+    r"^\s*(import\b|from\s+\S+\s+import\b|#include\b|using\b|use\b|require\b|require_once\b|"
+    r"include\b|package\b|library\(|source\b|\.\s+\S|Import-Module\b|extern\s+crate\b)"
+)
+
+# Lines that cannot start a new declaration
+CONTINUATION_PATTERN = re.compile(r"^(\}|\)|\]|end\b|fi\b|done\b|esac\b|else\b|elif\b|catch\b|finally\b|#|//|/\*|\*)")
+
+# Comments may open a declaration (doc comments belong to the code that follows them)
+COMMENT_PATTERN = re.compile(r"^(#|//|/\*|\*)")
+
+# Lines that close a block
+BLOCK_END_PATTERN = re.compile(r"^(\}[;)]*|end|fi|done|esac)\s*$")
+
+# Declarations whose body is a list of members that can be converted separately
+CONTAINER_PATTERN = re.compile(
+    r"\b(class|struct|interface|enum|namespace|impl|module|object|trait|record|extension|protocol)\b"
+)
+
+# Containers whose members stay at module level in Python
+NAMESPACE_PATTERN = re.compile(r"\b(namespace|module|package)\b")
+
+# Single-line members listed in a container outline (fields rather than methods)
+MAX_OUTLINE_FIELDS = 50
+
+# C++-style access labels, which sit between members rather than starting one
+ACCESS_LABEL_PATTERN = re.compile(r"^(public|private|protected|internal)\s*:")
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a piece of source code"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _indentation(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+def _split_at_indentation(lines: List[str], indent: int) -> List[str]:
+    """Split lines into segments at declarations starting at the given indentation"""
+    segments = []
+    current = []
+    previous = ""
+    
+    for line in lines:
+        stripped = line.strip()
+        previous_stripped = previous.strip()
+        after_boundary = (
+            not previous_stripped
+            # The line opening the enclosing block
+            or (previous_stripped.endswith("{") and _indentation(previous) < indent)
+            or ACCESS_LABEL_PATTERN.match(previous_stripped)
+            or (
+                _indentation(previous) == indent
+                and not COMMENT_PATTERN.match(previous_stripped)
+                and (BLOCK_END_PATTERN.match(previous_stripped) or previous_stripped.endswith(";"))
+            )
+        )
+        starts_declaration = (
+            stripped
+            and _indentation(line) == indent
+            and (COMMENT_PATTERN.match(stripped) or not CONTINUATION_PATTERN.match(stripped))
+            and after_boundary
+        )
+        if starts_declaration and current:
+            segments.append("".join(current))
+            current = []
+        current.append(line)
+        previous = line
+    
+    if current:
+        segments.append("".join(current))
+    return segments
+
+def split_top_level(source: str) -> List[str]:
+    """Split source into segments at top-level declaration boundaries"""
+    return _split_at_indentation(source.splitlines(keepends=True), 0)
+
+def _container_header(lines: List[str]) -> Tuple[int, List[str]]:
+    """Base indentation and leading lines (up to the first nested line) of a declaration"""
+    code = [line for line in lines if line.strip()]
+    base = min(_indentation(line) for line in code)
+    header = []
+    for line in code:
+        if _indentation(line) > base:
+            break
+        header.append(line)
+    return base, header
+
+def split_members(segment: str) -> List[str]:
+    """Split a class-like declaration at its members (the first nesting level inside it)
+    
+    The first piece keeps the declaration header and the last keeps the closing
+    lines; anything that is not a container comes back as a single segment.
+    """
+    lines = segment.splitlines(keepends=True)
+    if not any(line.strip() for line in lines):
+        return [segment]
+    base, header = _container_header(lines)
+    if not any(
+        CONTAINER_PATTERN.search(line) for line in header if not COMMENT_PATTERN.match(line.strip())
+    ):
+        return [segment]
+    
+    nested = [
+        _indentation(line) for line in lines
+        if line.strip() and _indentation(line) > base and not ACCESS_LABEL_PATTERN.match(line.strip())
+    ]
+    if not nested:
+        return [segment]
+    return _split_at_indentation(lines, min(nested))
+
+def container_outline(segment: str) -> str:
+    """Header and single-line members (fields) of a class-like declaration, as context for its members"""
+    lines = segment.splitlines(keepends=True)
+    _, header = _container_header(lines)
+    members = split_members(segment)
+    # The first member piece starts with the header itself
+    members[0] = "".join(members[0].splitlines(keepends=True)[len(header):])
+    
+    fields = []
+    for member in members:
+        code = [
+            line.rstrip() for line in member.splitlines()
+            if line.strip() and not CONTINUATION_PATTERN.match(line.strip())
+            and not ACCESS_LABEL_PATTERN.match(line.strip())
+        ]
+        if len(code) == 1:
+            fields.append(code[0])
+    return "".join(header).rstrip() + "".join(f"\n{field}" for field in fields[:MAX_OUTLINE_FIELDS])
+
+def _split_lines(segment: str, max_tokens: int) -> List[str]:
+    pieces = []
+    piece = ""
+    for line in segment.splitlines(keepends=True):
+        if piece and estimate_tokens(piece + line) > max_tokens:
+            pieces.append(piece)
+            piece = ""
+        piece += line
+    if piece:
+        pieces.append(piece)
+    return pieces
+
+def _split_oversized(
+    segment: str,
+    max_tokens: int,
+    containers: Tuple[str, ...] = ()
+) -> List[Tuple[str, Tuple[str, ...], Optional[Tuple[str, ...]]]]:
+    """Split a segment at member boundaries, falling back to lines only for a single oversized member
+    
+    Returns (piece, enclosing container outlines, containers opened by the piece's header).
+    """
+    if estimate_tokens(segment) <= max_tokens:
+        return [(segment, containers, None)]
+    members = split_members(segment)
+    if len(members) > 1:
+        _, header = _container_header(segment.splitlines(keepends=True))
+        if any(NAMESPACE_PATTERN.search(line) for line in header):
+            inner = containers
+        else:
+            inner = containers + (container_outline(segment),)
+        first = _split_oversized(members[0], max_tokens, containers)
+        first[0] = (first[0][0], first[0][1], inner)
+        return first + [
+            piece for member in members[1:] for piece in _split_oversized(member, max_tokens, inner)
+        ]
+    return [(piece, containers, None) for piece in _split_lines(segment, max_tokens)]
+
+def plan_chunks(source: str, max_tokens: int) -> List[Tuple[str, Tuple[str, ...]]]:
+    """Group declaration segments into chunks of at most max_tokens (estimated)
+    
+    Each chunk comes with the outlines of the classes it is a run of members of
+    (empty for module-level code). Members only share a chunk with code outside
+    their class when that chunk also holds the class header.
+    """
+    chunks = []
+    current = ""
+    level: Tuple[str, ...] = ()
+    open_levels = set()
+    
+    for segment in split_top_level(source):
+        for piece, containers, opens in _split_oversized(segment, max_tokens):
+            if current and (
+                estimate_tokens(current + piece) > max_tokens or containers not in open_levels
+            ):
+                chunks.append((current, level))
+                current = ""
+            if not current:
+                level = containers
+                open_levels = {containers}
+            current += piece
+            if opens is not None:
+                open_levels.add(opens)
+    
+    if current:
+        chunks.append((current, level))
+    return chunks
+
+def chunk_source(source: str, max_tokens: int) -> List[str]:
+    """Group declaration segments into chunks of at most max_tokens (estimated)"""
+    return [chunk for chunk, _ in plan_chunks(source, max_tokens)]
+
+def extract_shared_context(source: str) -> Tuple[List[str], List[str]]:
+    """Get import lines and top-level declaration signatures of a file"""
+    imports = []
+    signatures = []
+    
+    for segment in split_top_level(source):
+        for line in segment.splitlines():
+            if IMPORT_PATTERN.match(line):
+                imports.append(line.strip())
+        
+        first_line = next(
+            (line for line in segment.splitlines() if line.strip() and not COMMENT_PATTERN.match(line.strip())),
+            ""
+        )
+        if first_line and not IMPORT_PATTERN.match(first_line) and not CONTINUATION_PATTERN.match(first_line):
+            signatures.append(first_line.strip().rstrip("{").strip())
+    
+    return imports, signatures
+
+def _member_body(code: str, depth: int) -> Tuple[List[str], str]:
+    """Imports and class body lines of a converted member chunk, indented for its class depth"""
+    imports = []
+    body = []
+    for line in textwrap.dedent(code).splitlines():
+        if re.match(r"^(import\s|from\s+\S+\s+import\s)", line):
+            imports.append(line)
+        else:
+            body.append(line)
+    
+    # Unwrap a class statement repeated around the members
+    code_lines = [index for index, line in enumerate(body) if line.strip()]
+    if code_lines and re.match(r"^class\s", body[code_lines[0]]) and all(
+        _indentation(body[index]) > 0 for index in code_lines[1:]
+    ):
+        body = textwrap.dedent("\n".join(body[code_lines[0] + 1:])).splitlines()
+    
+    indent = "    " * depth
+    return imports, "\n".join(indent + line if line.strip() else "" for line in body).strip("\n")
+
+def merge_python_chunks(chunks: List[str], depths: Optional[List[int]] = None) -> str:
+    """Stitch converted Python chunks into one module with deduplicated imports
+    
+    Chunks with a depth above zero hold members only and are appended to the
+    class left open by the chunk before them.
+    """
+    imports = []
+    bodies = []
+    
+    for index, chunk in enumerate(chunks):
+        depth = depths[index] if depths else 0
+        if depth and bodies:
+            member_imports, members = _member_body(chunk, depth)
+            imports.extend(line for line in member_imports if line not in imports)
+            if members:
+                bodies[-1] = f"{bodies[-1]}\n\n{members}" if bodies[-1] else members
+            continue
+        
+        body = []
+        for line in chunk.splitlines():
+            if re.match(r"^(import\s|from\s+\S+\s+import\s)", line):
+                if line not in imports:
+                    imports.append(line)
+            else:
+                body.append(line)
+        bodies.append("\n".join(body).strip("\n"))
+    
+    parts = ["\n".join(imports)] if imports else []
+    parts.extend(body for body in bodies if body)
+    return "\n\n\n".join(parts) + "\n"
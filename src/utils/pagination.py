@@ -0,0 +1,23 @@
+"""
+Opaque cursors for keyset pagination
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Encode the sort key of the last row on a page"""
+    payload = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor from encode_cursor (raises ValueError if malformed)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(created_at, str) or not isinstance(row_id, str):
+            raise TypeError("Cursor fields must be strings")
+        return datetime.fromisoformat(created_at), row_id
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,55 @@
+"""
+Bounded in-process LRU cache with per-entry time-to-live
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+class TTLCache:
+    """LRU cache whose entries expire after a time-to-live (event-loop use, not thread-safe)"""
+    
+    def __init__(self, max_entries: int, ttl: float, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for a live entry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self.pop(key)
+            return False, None
+        
+        self._entries.move_to_end(key)
+        return True, value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: int = 0) -> None:
+        """Store a value of the given size, evicting least recently used entries when full"""
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.pop(key)
+            return
+        self.pop(key)
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value, size)
+        self.total_bytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.total_bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+    
+    def pop(self, key: Hashable) -> None:
+        """Remove an entry if present"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
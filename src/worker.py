@@ -0,0 +1,122 @@
+"""
+Worker process draining the durable conversion job queue
+
+Run with: python -m src.worker
+"""
+import asyncio
+import os
+import signal
+import socket
+from typing import Optional, Tuple
+import structlog
+
+from .config import settings
+from .models.database import create_tables, SessionLocal, User, ConversionJob
+from .services.job_queue import JobQueue
+from .services.llm_service import close_llm_clients
+from .main import github_app_service, run_conversion_job
+
+logger = structlog.get_logger()
+
+class Worker:
+    """Claims queued conversion jobs and runs them with bounded concurrency"""
+    
+    def __init__(self, concurrency: Optional[int] = None, queue: Optional[JobQueue] = None):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = max(1, concurrency or settings.worker_concurrency)
+        self.queue = queue or JobQueue()
+        self._stopping = asyncio.Event()
+    
+    def stop(self) -> None:
+        """Stop claiming new jobs; in-flight jobs run to completion"""
+        if not self._stopping.is_set():
+            logger.info("Worker stopping", worker_id=self.worker_id)
+            self._stopping.set()
+    
+    async def run(self) -> None:
+        """Run worker slots until stopped"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:
+                pass  # Signal handlers are unavailable on some platforms
+        
+        logger.info("Worker started", worker_id=self.worker_id, concurrency=self.concurrency)
+        try:
+            await asyncio.gather(*[self._run_slot() for _ in range(self.concurrency)])
+        finally:
+            await close_llm_clients()
+            await github_app_service.close()
+            self.queue.close()
+            logger.info("Worker stopped", worker_id=self.worker_id)
+    
+    async def _run_slot(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                claimed = await self.queue.claim(self.worker_id)
+            except Exception as e:
+                logger.error("Failed to claim job", worker_id=self.worker_id, error=str(e))
+                claimed = None
+            
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=settings.worker_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await self._process_job(*claimed)
+    
+    async def _process_job(self, job_id: str, user_id: str) -> None:
+        job, user = await asyncio.to_thread(self._load_job, job_id, user_id)
+        if not job or not user:
+            logger.error("Job or user not found", job_id=job_id, user_id=user_id)
+            await self.queue.fail(job_id, self.worker_id, "Job or user not found")
+            return
+        
+        conversion = asyncio.create_task(run_conversion_job(job, user))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, conversion))
+        
+        try:
+            await conversion
+        except asyncio.CancelledError:
+            logger.warning("Conversion job abandoned after losing lease", job_id=job_id)
+            return
+        except Exception as e:
+            logger.error("Conversion job failed", job_id=job_id, error=str(e))
+            await self.queue.fail(job_id, self.worker_id, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+        
+        await self.queue.complete(job_id, self.worker_id)
+        logger.info("Conversion job completed", job_id=job_id, worker_id=self.worker_id)
+    
+    async def _heartbeat(self, job_id: str, conversion: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(settings.job_heartbeat_interval)
+            try:
+                owned = await self.queue.heartbeat(job_id, self.worker_id)
+            except Exception as e:
+                logger.warning("Job heartbeat failed", job_id=job_id, error=str(e))
+                continue
+            
+            if not owned:
+                logger.warning("Job lease lost, cancelling", job_id=job_id, worker_id=self.worker_id)
+                conversion.cancel()
+                return
+    
+    def _load_job(self, job_id: str, user_id: str) -> Tuple[Optional[ConversionJob], Optional[User]]:
+        with SessionLocal() as db:
+            job = db.query(ConversionJob).filter(ConversionJob.id == job_id).first()
+            user = db.query(User).filter(User.id == user_id).first()
+            return job, user
+
+def main():
+    """Worker entry point"""
+    create_tables()
+    asyncio.run(Worker().run())
+
+if __name__ == "__main__":
+    main()
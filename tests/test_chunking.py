@@ -0,0 +1,126 @@
+"""
+Chunk boundaries for large source files
+"""
+import ast
+import asyncio
+import re
+
+from src.config import settings
+from src.services.llm_service import LLMService
+from src.utils.chunking import chunk_source, estimate_tokens, split_members
+
+MEMBER_START = re.compile(r"^    (/\*\*|@|public |private |protected |static |void |int |std::)")
+
+def java_class(methods: int) -> str:
+    members = []
+    for index in range(methods):
+        members.append(
+            f"    /**\n"
+            f"     * Computes value {index}.\n"
+            f"     */\n"
+            f"    public int compute{index}(int x) {{\n"
+            f"        int total = 0;\n"
+            f"        for (int k = 0; k < x; k++) {{\n"
+            f"            int y = x * {index};\n"
+            f"            total += y + k;\n"
+            f"        }}\n"
+            f"        return total;\n"
+            f"    }}\n"
+        )
+    return (
+        "package com.example;\n\n"
+        "import java.util.List;\n\n"
+        "public class Calculator {\n"
+        "    private final int base;\n"
+        "    private static final int LIMIT = 10;\n\n"
+        + "\n".join(members)
+        + "}\n"
+    )
+
+def cpp_class(methods: int) -> str:
+    members = []
+    for index in range(methods):
+        members.append(
+            f"    int compute{index}(int x) {{\n"
+            f"        int total = 0;\n"
+            f"        for (int k = 0; k < x; k++) {{\n"
+            f"            total += x * {index} + k;\n"
+            f"        }}\n"
+            f"        return total;\n"
+            f"    }}\n"
+        )
+    return (
+        "#include <vector>\n\n"
+        "namespace example {\n\n"
+        "class Calculator\n"
+        "{\n"
+        "public:\n"
+        + "".join(members)
+        + "private:\n"
+        "    std::vector<int> values_;\n"
+        "};\n\n"
+        "}  // namespace example\n"
+    )
+
+def assert_declaration_boundaries(source: str, chunks: list, closing: str) -> None:
+    assert "".join(chunks) == source
+    assert len(chunks) > 1
+    for chunk in chunks[1:]:
+        first_line = chunk.splitlines()[0]
+        assert MEMBER_START.match(first_line), first_line
+    for chunk in chunks[:-1]:
+        last_line = next(line for line in reversed(chunk.splitlines()) if line.strip())
+        assert last_line in ("    }", closing) or last_line.endswith(";"), last_line
+
+def test_java_class_chunks_on_member_boundaries():
+    source = java_class(40)
+    chunks = chunk_source(source, 300)
+    assert_declaration_boundaries(source, chunks, "}")
+    assert all(estimate_tokens(chunk) <= 300 for chunk in chunks)
+
+def test_cpp_class_chunks_on_member_boundaries():
+    source = cpp_class(40)
+    chunks = chunk_source(source, 300)
+    assert_declaration_boundaries(source, chunks, "};")
+
+def test_non_container_is_not_split_into_members():
+    method = java_class(1).split("public class Calculator {\n")[1]
+    assert split_members(method) == [method]
+
+def test_oversized_member_falls_back_to_line_splits():
+    body = "".join(f"        int v{index} = {index};\n" for index in range(200))
+    source = f"public class Big {{\n    public void run() {{\n{body}    }}\n}}\n"
+    chunks = chunk_source(source, 200)
+    assert "".join(chunks) == source
+    assert len(chunks) > 1
+
+def test_class_split_across_chunks_merges_into_one_class(monkeypatch):
+    monkeypatch.setattr(settings, "llm_chunk_max_tokens", 300)
+    service = LLMService("sk-test", "gpt-4")
+    contexts = []
+    
+    async def fake_convert(source, file_path, source_language, target_language="python", context=None):
+        contexts.append(context)
+        methods = "".join(
+            f"    def compute{index}(self, x):\n        return sum(x * {index} + k for k in range(x))\n\n"
+            for index in re.findall(r"int compute(\d+)\(", source)
+        )
+        if "public class Calculator" in source:
+            return f"from typing import List\n\n\nclass Calculator:\n    LIMIT = 10\n\n{methods}", "header"
+        # Models do not always drop the class statement when asked to
+        if len(contexts) % 2:
+            return f"from typing import List\n\nclass Calculator:\n{methods}", "members"
+        return methods, "members"
+    
+    monkeypatch.setattr(service, "_convert_source", fake_convert)
+    converted, _ = asyncio.run(service.convert_code_to_python(java_class(40), "Calculator.java", "java"))
+    
+    assert len(contexts) > 2
+    assert all("public class Calculator {" in context for context in contexts[1:])
+    assert converted.count("class Calculator") == 1
+    assert converted.count("from typing import List") == 1
+    module = ast.parse(converted)
+    classes = [node for node in module.body if isinstance(node, ast.ClassDef)]
+    assert len(classes) == 1
+    methods = [node.name for node in classes[0].body if isinstance(node, ast.FunctionDef)]
+    assert methods == [f"compute{index}" for index in range(40)]
@@ -0,0 +1,53 @@
+"""
+Deadlines and retries around scheduled LLM requests
+"""
+import asyncio
+
+from src.config import settings
+from src.services.llm_resilience import LLMResilience
+from src.services.llm_scheduler import LLMScheduler
+
+class RawResponse:
+    headers = {}
+    
+    def parse(self):
+        return "parsed"
+
+def test_deadline_excludes_time_queued_for_budget(monkeypatch):
+    monkeypatch.setattr(settings, "llm_request_deadline", 0.5)
+    monkeypatch.setattr(settings, "llm_hedging_enabled", False)
+    
+    async def scenario():
+        # Two requests per second: the last of eight requests queues for about three seconds
+        resilience = LLMResilience(LLMScheduler(requests_per_minute=120, tokens_per_minute=1000000))
+        resilience.scheduler.requests.available = 1.0
+        
+        async def request():
+            await asyncio.sleep(0.05)
+            return RawResponse()
+        
+        results = await asyncio.gather(*[resilience.run("convert", request, 10) for _ in range(8)])
+        return results, resilience
+    
+    results, resilience = asyncio.run(scenario())
+    assert results == ["parsed"] * 8
+    assert resilience.deadlines_exceeded == 0
+    assert resilience.scheduler.max_wait > settings.llm_request_deadline
+
+def test_deadline_still_bounds_slow_requests(monkeypatch):
+    monkeypatch.setattr(settings, "llm_request_deadline", 0.2)
+    monkeypatch.setattr(settings, "llm_hedging_enabled", False)
+    
+    async def scenario():
+        resilience = LLMResilience(LLMScheduler(requests_per_minute=120, tokens_per_minute=1000000))
+        
+        async def request():
+            await asyncio.sleep(5)
+        
+        try:
+            await resilience.run("convert", request, 10)
+        except asyncio.TimeoutError:
+            return resilience
+        raise AssertionError("request outlived its deadline")
+    
+    assert asyncio.run(scenario()).deadlines_exceeded == 1
@@ -0,0 +1,33 @@
+"""
+Admission of LLM requests by the rate limit scheduler
+"""
+import asyncio
+
+from src.services.llm_scheduler import LLMScheduler
+
+class RawResponse:
+    headers = {}
+    
+    def parse(self):
+        return "parsed"
+
+def test_cancelled_probe_releases_queued_requests():
+    async def scenario():
+        scheduler = LLMScheduler()
+        probe_started = asyncio.Event()
+        
+        async def hanging_request():
+            probe_started.set()
+            await asyncio.sleep(60)
+        
+        async def quick_request():
+            return RawResponse()
+        
+        probe = asyncio.ensure_future(scheduler.run(hanging_request, 10))
+        await probe_started.wait()
+        queued = asyncio.ensure_future(scheduler.run(quick_request, 10))
+        await asyncio.sleep(0)
+        probe.cancel()
+        return await asyncio.wait_for(queued, 1)
+    
+    assert asyncio.run(scenario()) == "parsed"
@@ -0,0 +1,24 @@
+"""
+Additive migrations for databases created from older models
+"""
+from sqlalchemy import create_engine, inspect, text
+
+from src.models.database import ADDED_COLUMNS, apply_additive_migrations
+
+def test_additive_migrations_bring_old_tables_up_to_date():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id VARCHAR(36) PRIMARY KEY, email VARCHAR(255), api_key VARCHAR(255))"))
+        conn.execute(text("CREATE TABLE conversion_jobs (id VARCHAR(36) PRIMARY KEY, user_id VARCHAR(36), status VARCHAR(50), created_at TIMESTAMP)"))
+        conn.execute(text("CREATE TABLE conversion_cache (cache_key VARCHAR(64) PRIMARY KEY, last_accessed_at TIMESTAMP)"))
+        conn.execute(text("CREATE TABLE schema_version (id INTEGER PRIMARY KEY, version VARCHAR(64))"))
+        applied = apply_additive_migrations(conn)
+    
+    inspector = inspect(engine)
+    for table_name, columns in ADDED_COLUMNS.items():
+        assert set(columns) <= {column["name"] for column in inspector.get_columns(table_name)}
+    assert "ix_conversion_jobs_user_id_created_at" in {index["name"] for index in inspector.get_indexes("conversion_jobs")}
+    
+    with engine.begin() as conn:
+        assert apply_additive_migrations(conn) == []
+    assert applied